@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from users.views import AvatarDetail
 from core.views import DownloadShopCartView
-from recipes.views import (FavoriteViewSet, IngredientViewSet,
+from recipes.views import (FavoriteViewSet, FeedViewSet, IngredientViewSet,
                            RecipeShortLinkView, RecipeViewSet,
                            ShoppingCartViewSet, SubscribeViewSet,
                            SubscriptionsViewSet, TagViewSet)
@@ -34,6 +34,9 @@ urlpatterns = [
     path('users/subscriptions/',
          SubscriptionsViewSet.as_view({'get': 'list'}),
          name='subscriptions'),
+    path('users/feed/',
+         FeedViewSet.as_view({'get': 'list'}),
+         name='feed'),
     path('users/<int:pk>/subscribe/',
          SubscribeViewSet.as_view({'post': 'create', 'delete': 'destroy'}),
          name='subscribe'),
@@ -0,0 +1,50 @@
+"""Адреса для запуска под ASGI.
+
+Читающие эндпоинты обслуживаются асинхронными представлениями, остальные
+адреса и методы — теми же синхронными представлениями, что и под WSGI.
+"""
+from django.urls import path
+
+from backend.urls import urlpatterns as sync_urlpatterns
+from core.async_views import async_reads, download_shopping_cart
+from core.views import DownloadShopCartView
+from recipes import async_views
+from recipes.views import (IngredientViewSet, RecipeRedirectView,
+                           RecipeViewSet, TagViewSet)
+
+recipe_list = RecipeViewSet.as_view({'get': 'list', 'post': 'create'})
+recipe_detail = RecipeViewSet.as_view({'get': 'retrieve', 'put': 'update',
+                                       'patch': 'partial_update',
+                                       'delete': 'destroy'})
+
+urlpatterns = [
+    path('s/<str:short_id>/',
+         async_reads(async_views.recipe_redirect,
+                     RecipeRedirectView.as_view(), anonymous=True),
+         name='async-recipe-redirect'),
+    path('api/recipes/',
+         async_reads(async_views.recipe_list, recipe_list),
+         name='async-recipes-list'),
+    path('api/recipes/download_shopping_cart/',
+         async_reads(download_shopping_cart, DownloadShopCartView.as_view()),
+         name='async-download-shopping-cart'),
+    path('api/recipes/<int:pk>/',
+         async_reads(async_views.recipe_detail, recipe_detail),
+         name='async-recipes-detail'),
+    path('api/tags/',
+         async_reads(async_views.tag_list,
+                     TagViewSet.as_view({'get': 'list'})),
+         name='async-tags-list'),
+    path('api/tags/<int:pk>/',
+         async_reads(async_views.tag_detail,
+                     TagViewSet.as_view({'get': 'retrieve'})),
+         name='async-tags-detail'),
+    path('api/ingredients/',
+         async_reads(async_views.ingredient_list,
+                     IngredientViewSet.as_view({'get': 'list'})),
+         name='async-ingredients-list'),
+    path('api/ingredients/<int:pk>/',
+         async_reads(async_views.ingredient_detail,
+                     IngredientViewSet.as_view({'get': 'retrieve'})),
+         name='async-ingredients-detail'),
+] + sync_urlpatterns
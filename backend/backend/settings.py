@@ -58,6 +58,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -69,6 +72,8 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'backend.urls'
+# Адреса с асинхронными представлениями, их подставляет backend/asgi.py.
+ASGI_URLCONF = 'backend.asgi_urls'
 
 TEMPLATES = [
     {
@@ -103,6 +108,44 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: хосты через запятую, «хост:порт».
+DATABASE_REPLICAS = []
+for number, address in enumerate(
+        filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+# Локальный запуск и тесты без PostgreSQL.
+if os.getenv('USE_SQLITE', 'False').lower() == 'true':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        },
+        # Второе подключение к тому же файлу вместо реплики.
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
+    DATABASE_REPLICAS = (
+        ['replica'] if os.getenv('USE_SQLITE_REPLICA', 'False').lower()
+        == 'true' else [])
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# Сколько секунд после записи клиент читает только с основной базы.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 5))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL',
+                                             5))
+
 
 # Password validation!
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -143,6 +186,87 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.getenv("MEDIA_ROOT")
 
+# Пересжатие загруженных изображений в пуле потоков после ответа.
+IMAGE_PROCESSING_ASYNC = os.getenv(
+    'IMAGE_PROCESSING_ASYNC', 'True').lower() == 'true'
+IMAGE_PROCESSING_WORKERS = int(os.getenv('IMAGE_PROCESSING_WORKERS', 2))
+
+# Общий кэш воркеров: Redis из REDIS_URL, без него — память процесса.
+REDIS_URL = os.getenv('REDIS_URL')
+# ID пользователей по токенам: время жизни записи. Кэш в памяти процесса
+# не видел бы выхода в других воркерах, поэтому без Redis кэш отключён.
+AUTH_TOKEN_CACHE = 'auth'
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        AUTH_TOKEN_CACHE: {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': AUTH_TOKEN_CACHE,
+            'TIMEOUT': AUTH_TOKEN_CACHE_TIMEOUT,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        AUTH_TOKEN_CACHE: {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+    }
+
+# Число ответов API для анонимных пользователей, хранимых в памяти процесса.
+ANONYMOUS_CACHE_MAX_ENTRIES = int(
+    os.getenv('ANONYMOUS_CACHE_MAX_ENTRIES', 1024))
+
+# Метрики запросов: доля измеряемых запросов и токен для /metrics/.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 1))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Журнал медленных SQL-запросов (JSON Lines с ротацией). Для доли
+# SLOW_QUERY_EXPLAIN_RATE запросов SELECT в фоне сохраняется план EXPLAIN.
+# SLOW_QUERY_THRESHOLD_MS=off отключает журнал.
+SLOW_QUERY_THRESHOLD_MS = os.getenv('SLOW_QUERY_THRESHOLD_MS', '500')
+SLOW_QUERY_THRESHOLD_MS = (None if SLOW_QUERY_THRESHOLD_MS.lower() == 'off'
+                           else float(SLOW_QUERY_THRESHOLD_MS))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', 0.1))
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', BASE_DIR / 'slow_queries.jsonl')
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv('SLOW_QUERY_LOG_MAX_BYTES',
+                                         10 * 1024 * 1024))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv('SLOW_QUERY_LOG_BACKUPS', 5))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': SLOW_QUERY_LOG_MAX_BYTES,
+            'backupCount': SLOW_QUERY_LOG_BACKUPS,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'foodgram.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -159,7 +283,11 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
 
@@ -3,7 +3,7 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-
+from core.views import metrics_view
 from recipes.views import RecipeRedirectView
 
 urlpatterns = [
@@ -11,6 +11,7 @@ urlpatterns = [
     path('s/<str:short_id>/', RecipeRedirectView.as_view(),
          name='recipe-redirect'),
     path('api/', include('api.urls')),
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,206 @@
+"""Общие части асинхронных представлений для запуска под ASGI.
+
+Асинхронные представления обслуживают только чтение в формате JSON:
+запросы к базе выполняются асинхронным ORM, и воркер не простаивает,
+пока отвечает PostgreSQL. Запись и Browsable API по-прежнему
+обрабатываются синхронными представлениями DRF.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import (AuthenticationFailed, NotAuthenticated,
+                                       NotFound)
+from rest_framework.request import Request
+
+from core.authentication import active_user, token_cache
+from core.cache import aget_data_version
+from core.db_router import primary
+from core.constants import (REFERENCE_CACHE_MAX_AGE,
+                            SHOPPING_CART_CURSOR_CHUNK_SIZE,
+                            SHOPPING_CART_LINES_PER_CHUNK)
+from core.mixins import (anonymous_payloads, etag_matches,
+                         patch_reference_headers, payload_key, payloads,
+                         reference_etag)
+from core.renderers import TimedJSONRenderer
+from core.views import (SHOPPING_CART_FORMATS, shopping_cart_format_error,
+                        shopping_cart_ingredients, shopping_cart_response)
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """JSON-ответ; данные сохраняются в ``data``, как у Response DRF."""
+    response = HttpResponse(TimedJSONRenderer().render(data),
+                            status=status_code,
+                            content_type='application/json')
+    response.data = data
+    return response
+
+
+def error_response(error):
+    response = json_response({'detail': error.detail}, error.status_code)
+    if error.status_code == status.HTTP_401_UNAUTHORIZED:
+        response['WWW-Authenticate'] = 'Token'
+    return response
+
+
+def not_found(model):
+    """404 с тем же текстом, что у get_object_or_404 в GenericAPIView."""
+    return error_response(NotFound(
+        f'No {model._meta.object_name} matches the given query.'))
+
+
+def drf_request(request):
+    """Request DRF для контекста сериализаторов без повторной
+    аутентификации."""
+    wrapped = Request(request)
+    wrapped.user = request.user
+    return wrapped
+
+
+async def authenticate(request):
+    """Асинхронный аналог CachedTokenAuthentication."""
+    header = request.headers.get('Authorization', '').split()
+    if not header or header[0].lower() != 'token':
+        return AnonymousUser()
+    if len(header) == 1:
+        raise AuthenticationFailed(
+            _('Invalid token header. No credentials provided.'))
+    if len(header) > 2:
+        raise AuthenticationFailed(
+            _('Invalid token header. '
+              'Token string should not contain spaces.'))
+    user_id = await token_cache.aget(header[1])
+    if user_id is not None:
+        return active_user(await get_user_model().objects.filter(
+            pk=user_id).afirst())
+    try:
+        token = await Token.objects.select_related('user').aget(
+            key=header[1])
+    except Token.DoesNotExist:
+        raise AuthenticationFailed(_('Invalid token.'))
+    if not token.user.is_active:
+        raise AuthenticationFailed(_('User inactive or deleted.'))
+    await token_cache.aset(header[1], token.user_id)
+    return token.user
+
+
+def wants_json(request):
+    return ('format' not in request.GET
+            and 'text/html' not in request.headers.get('Accept', ''))
+
+
+async def aiterate(iterator):
+    """Отдаёт элементы синхронного итератора, получая каждый в потоке
+    синхронного кода."""
+    get_next = sync_to_async(next)
+    iterator = iter(iterator)
+    end = object()
+    while True:
+        item = await get_next(iterator, end)
+        if item is end:
+            return
+        yield item
+
+
+def async_reads(async_view, sync_view, anonymous=False):
+    """Представление, отдающее GET-запросы за JSON асинхронной версии.
+
+    Остальные запросы передаются синхронному ``sync_view`` через
+    sync_to_async. С ``anonymous=True`` пользователь не определяется.
+    """
+    sync_view = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET' or not wants_json(request):
+            response = await sync_view(request, *args, **kwargs)
+            if response.streaming and not response.is_async:
+                # Синхронный поток Django под ASGI собрал бы в памяти
+                # целиком.
+                response.streaming_content = aiterate(
+                    response.streaming_content)
+            return response
+        if not anonymous:
+            try:
+                request.user = await authenticate(request)
+            except AuthenticationFailed as error:
+                return error_response(error)
+        return await async_view(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
+
+
+async def versioned_response(request, namespace, action, kwargs, load):
+    """Асинхронный вариант VersionedCacheMixin.versioned_response.
+
+    ``load`` — корутина, возвращающая ответ из json_response.
+    """
+    version = await aget_data_version(namespace)
+    etag = reference_etag(namespace, version, TimedJSONRenderer.format)
+    if etag_matches(request, etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        key = payload_key(namespace, version, action, kwargs, request.GET)
+        data = payloads.get(key)
+        if data is None:
+            with primary():
+                response = await load()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            payloads.set(key, response.data)
+        else:
+            response = json_response(data)
+    patch_reference_headers(response, etag, REFERENCE_CACHE_MAX_AGE)
+    return response
+
+
+async def anonymous_response(request, namespace, action, kwargs, load):
+    """Асинхронный вариант AnonymousCacheMixin.anonymous_response."""
+    if request.user.is_authenticated:
+        return await load()
+    key = payload_key(namespace, await aget_data_version(namespace), action,
+                      kwargs, request.GET, host=request.get_host())
+    data = anonymous_payloads.get(key)
+    if data is not None:
+        response = json_response(data)
+        response['X-Cache'] = 'HIT'
+        return response
+    with primary():
+        response = await load()
+    if response.status_code == status.HTTP_200_OK:
+        anonymous_payloads.set(key, response.data)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+async def shopping_cart_chunks(header, line, ingredients,
+                               size=SHOPPING_CART_LINES_PER_CHUNK):
+    """Блоки строк списка покупок из асинхронного курсора."""
+    chunk = [header] if header else []
+    number = 0
+    async for ingredient in ingredients:
+        number += 1
+        chunk.append(line(number, ingredient))
+        if len(chunk) >= size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+async def download_shopping_cart(request):
+    """Асинхронная выгрузка списка покупок, см. DownloadShopCartView."""
+    if not request.user.is_authenticated:
+        return error_response(NotAuthenticated())
+    file_format = request.GET.get('file_format', 'txt')
+    if file_format not in SHOPPING_CART_FORMATS:
+        return json_response(shopping_cart_format_error(),
+                             status.HTTP_400_BAD_REQUEST)
+    header, line = SHOPPING_CART_FORMATS[file_format][:2]
+    ingredients = shopping_cart_ingredients(request.user).aiterator(
+        chunk_size=SHOPPING_CART_CURSOR_CHUNK_SIZE)
+    return shopping_cart_response(
+        shopping_cart_chunks(header, line, ingredients), file_format)
@@ -0,0 +1,100 @@
+from hashlib import sha256
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.authtoken.models import Token
+
+from core.constants import AUTH_TOKEN_KEY
+from core.metrics import registry
+
+
+def digest(key):
+    return sha256(key.encode()).hexdigest()
+
+
+class TokenCache:
+    """ID пользователей по ключу токена в общем кэше AUTH_TOKEN_CACHE.
+
+    Кэшируется только ID: сам пользователь загружается из базы на каждый
+    запрос, иначе устаревший объект при полном save() вернул бы в базу
+    старые значения полей (например, счётчиков). Ключ токена в кэш не
+    попадает.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[settings.AUTH_TOKEN_CACHE]
+
+    def count(self, user_id):
+        if user_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user_id
+
+    def get(self, key):
+        return self.count(self.cache.get(AUTH_TOKEN_KEY.format(digest(key))))
+
+    async def aget(self, key):
+        return self.count(
+            await self.cache.aget(AUTH_TOKEN_KEY.format(digest(key))))
+
+    def set(self, key, user_id):
+        self.cache.set(AUTH_TOKEN_KEY.format(digest(key)), user_id)
+
+    async def aset(self, key, user_id):
+        await self.cache.aset(AUTH_TOKEN_KEY.format(digest(key)), user_id)
+
+    def invalidate(self, key):
+        self.cache.delete(AUTH_TOKEN_KEY.format(digest(key)))
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+token_cache = TokenCache()
+
+
+@registry.register_collector
+def token_cache_stats():
+    lines = []
+    for name, value in token_cache.stats().items():
+        metric = f'foodgram_auth_token_cache_{name}_total'
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric} {value}')
+    return lines
+
+
+def active_user(user):
+    """Пользователь по закэшированному ID, если он ещё может входить."""
+    if user is None or not user.is_active:
+        raise AuthenticationFailed(_('User inactive or deleted.'))
+    return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без поиска токена в базе для известных токенов.
+
+    ID пользователя берётся из token_cache, а сам пользователь читается
+    по первичному ключу; при промахе — обычный запрос токена с
+    пользователем, ID кэшируется на AUTH_TOKEN_CACHE_TIMEOUT секунд.
+    Запись сбрасывается сигналом при удалении токена.
+    """
+
+    def authenticate_credentials(self, key):
+        user_id = token_cache.get(key)
+        if user_id is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user.pk)
+            return user, token
+        user = active_user(get_user_model().objects.filter(
+            pk=user_id).first())
+        return user, Token(key=key, user=user)
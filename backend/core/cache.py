@@ -0,0 +1,176 @@
+from collections import OrderedDict
+from threading import Lock
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from core.constants import CHANGE_LOG_MAX_ENTRIES, CHANGE_LOG_TIMEOUT
+from core.db_router import primary
+
+DATA_VERSION_KEY = 'data-version:{}'
+CHANGE_NUMBER_KEY = 'change-number:{}'
+CHANGE_KEY = 'change:{}:{}'
+
+
+def get_data_version(namespace):
+    """Возвращает токен текущей версии набора данных.
+
+    Токен хранится в общем кэше Django, поэтому изменение данных в одном
+    процессе становится видно остальным воркерам. Если ключ вытеснен из
+    кэша, создаётся новый токен и все локальные копии считаются устаревшими.
+    """
+    key = DATA_VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_data_version(namespace):
+    """Асинхронный вариант get_data_version."""
+    key = DATA_VERSION_KEY.format(namespace)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, uuid4().hex, timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_data_version(namespace):
+    """Помечает набор данных изменённым."""
+    cache.set(DATA_VERSION_KEY.format(namespace), uuid4().hex, timeout=None)
+
+
+def add_change_number(key):
+    """Создаёт счётчик изменений, если его нет в кэше.
+
+    Начальное значение случайно: после вытеснения счётчик не повторит
+    номера, которые уже видели воркеры.
+    """
+    cache.add(key, uuid4().int >> 66, timeout=None)
+
+
+def publish_changes(namespace, ids=None):
+    """Публикует ID изменённых объектов набора данных.
+
+    Изменения нумеруются атомарным счётчиком в общем кэше, и воркеры
+    применяют к своим копиям только пропущенные записи журнала.
+    ``ids=None`` означает, что изменилось всё: запись не сохраняется,
+    и копии пересобираются целиком.
+    """
+    key = CHANGE_NUMBER_KEY.format(namespace)
+    add_change_number(key)
+    try:
+        number = cache.incr(key)
+    except ValueError:
+        # Счётчик вытеснен между add и incr.
+        add_change_number(key)
+        number = cache.incr(key)
+    if ids is not None:
+        cache.set(CHANGE_KEY.format(namespace, number), list(ids),
+                  timeout=CHANGE_LOG_TIMEOUT)
+
+
+def read_changes(namespace, since):
+    """Возвращает номер последнего изменения и ID объектов, изменённых
+    после ``since``.
+
+    Вместо ID возвращается None, если копию нужно пересобрать целиком:
+    она ещё не построена, часть журнала вытеснена или устарела, либо
+    было опубликовано изменение всего набора.
+    """
+    key = CHANGE_NUMBER_KEY.format(namespace)
+    number = cache.get(key)
+    if number is None:
+        add_change_number(key)
+        number = cache.get(key)
+    if number == since:
+        return number, set()
+    if since is None or not 0 < number - since <= CHANGE_LOG_MAX_ENTRIES:
+        return number, None
+    keys = [CHANGE_KEY.format(namespace, change)
+            for change in range(since + 1, number + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        return number, None
+    return number, set().union(*changes.values())
+
+
+class LocalCopy:
+    """Копия набора данных в памяти процесса, которая обновляется по
+    журналу publish_changes.
+
+    Подклассы задают ``namespace`` и реализуют ``build`` (полная сборка)
+    и ``apply`` (обновление по ID изменённых объектов). Оба метода
+    выполняются под блокировкой и читают основную базу.
+    """
+
+    namespace = None
+
+    def __init__(self):
+        self._lock = Lock()
+        self._number = None
+
+    def build(self):
+        raise NotImplementedError
+
+    def apply(self, changed):
+        raise NotImplementedError
+
+    def refresh(self):
+        number, changed = read_changes(self.namespace, self._number)
+        if not changed and number == self._number:
+            return
+        with self._lock:
+            number, changed = read_changes(self.namespace, self._number)
+            with primary():
+                if changed is None:
+                    self.build()
+                elif changed:
+                    self.apply(changed)
+            self._number = number
+
+
+class LRUCache:
+    """Ограниченный по числу записей кэш в памяти процесса.
+
+    При переполнении вытесняется запись, к которой дольше всего
+    не обращались. Считает попадания и промахи.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits,
+                'misses': self.misses}
@@ -3,3 +3,33 @@ VERTICAL_FONT_POSITION = 720
 HORIZONTAL_FONT_POSITION = 100
 VERTICAL_SPACING = 20
 BUFFER_START_POSITION = 0
+SHOPPING_CART_FILENAME = 'shopping_cart'
+SHOPPING_CART_CURSOR_CHUNK_SIZE = 2000
+SHOPPING_CART_LINES_PER_CHUNK = 100
+REFERENCE_CACHE_MAX_AGE = 60
+REFERENCE_CACHE_MAX_ENTRIES = 512
+CHANGE_LOG_TIMEOUT = 60 * 60
+CHANGE_LOG_MAX_ENTRIES = 1000
+MAX_IMAGE_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+MAX_IMAGE_DIMENSION = 1600
+BASE64_CHUNK_SIZE = 64 * 1024
+IMAGE_FORMAT = 'WEBP'
+IMAGE_EXTENSION = 'webp'
+IMAGE_QUALITY = 82
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5,
+                           5, 10)
+REPLICA_PIN_COOKIE = 'primary_pin'
+REPLICA_PIN_KEY = 'replica-pin:{}'
+# Маршруты, которые можно читать с реплик.
+REPLICA_READ_ROUTES = frozenset((
+    'api:recipes-list', 'api:recipes-detail',
+    'api:tags-list', 'api:tags-detail',
+    'api:ingredients-list', 'api:ingredients-detail',
+    'api:download-shopping-cart',
+    'async-recipes-list', 'async-recipes-detail',
+    'async-tags-list', 'async-tags-detail',
+    'async-ingredients-list', 'async-ingredients-detail',
+    'async-download-shopping-cart',
+))
+AUTH_TOKEN_KEY = 'token:{}'
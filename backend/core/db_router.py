@@ -0,0 +1,110 @@
+"""Маршрутизация чтения на реплики PostgreSQL.
+
+Реплики перечислены в настройке DATABASE_REPLICAS. На них уходят только
+чтения, разрешённые ReplicaMiddleware для текущего запроса; всё остальное,
+включая запись, выполняется на основной базе.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from time import monotonic
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+# Можно ли читать с реплики в текущем запросе.
+replica_reads = ContextVar('replica_reads', default=False)
+
+# Данные, которые должны быть видны сразу после записи.
+PRIMARY_ONLY_MODELS = frozenset(('authtoken.token', 'sessions.session'))
+
+REPLICA_LAG_SQL = '''
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM
+                              now() - pg_last_xact_replay_timestamp()), 0)
+    END
+'''
+
+
+@contextmanager
+def primary():
+    """Чтение внутри блока выполняется на основной базе.
+
+    Нужно для данных, которые кэшируются до следующей смены версии:
+    копия с отстающей реплики осталась бы в кэше устаревшей.
+    """
+    token = replica_reads.set(False)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+def replica_lag(alias):
+    """Отставание реплики в секундах; None, если она недоступна."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(REPLICA_LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        connection.close()
+        return None
+
+
+class Replicas:
+    """Выбирает реплику по кругу среди отстающих не больше
+    REPLICA_MAX_LAG_SECONDS.
+
+    Отставание каждой реплики проверяется не чаще раза в
+    REPLICA_LAG_CHECK_INTERVAL секунд.
+    """
+
+    def __init__(self):
+        self._counter = count()
+        self._checked = {}
+
+    def healthy(self, alias):
+        now = monotonic()
+        checked = self._checked.get(alias)
+        if checked is None or (
+                now - checked[0] >= settings.REPLICA_LAG_CHECK_INTERVAL):
+            lag = replica_lag(alias)
+            checked = self._checked[alias] = (
+                now, lag is not None
+                and lag <= settings.REPLICA_MAX_LAG_SECONDS)
+        return checked[1]
+
+    def choose(self):
+        aliases = [alias for alias in settings.DATABASE_REPLICAS
+                   if self.healthy(alias)]
+        if not aliases:
+            return None
+        return aliases[next(self._counter) % len(aliases)]
+
+    def reset(self):
+        self._checked.clear()
+
+
+replicas = Replicas()
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if (not replica_reads.get()
+                or model._meta.label_lower in PRIMARY_ONLY_MODELS):
+            return DEFAULT_DB_ALIAS
+        return replicas.choose() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
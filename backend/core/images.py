@@ -0,0 +1,160 @@
+import base64
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import connection, transaction
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+from core.constants import (BASE64_CHUNK_SIZE, IMAGE_EXTENSION, IMAGE_FORMAT,
+                            IMAGE_QUALITY, MAX_IMAGE_DIMENSION)
+
+logger = logging.getLogger(__name__)
+
+# Отправляется после замены файла в поле оптимизированной копией:
+# UPDATE в обход save() не вызывает post_save.
+image_processed = Signal()
+
+PROCESSED_NAME = re.compile(rf'(^|/)[0-9a-f]{{16}}\.{IMAGE_EXTENSION}$')
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PROCESSING_WORKERS,
+    thread_name_prefix='images',
+)
+
+
+class DecodedImageFile(TemporaryUploadedFile):
+    """Временный файл декодированного изображения.
+
+    Файловое хранилище перемещает его на место, а не копирует; как и
+    загрузки из request.FILES, он закрывается без ошибки, если файла на
+    диске уже нет.
+    """
+
+    def __del__(self):
+        self.close()
+
+
+def decode_base64(data, start, name, content_type):
+    """Декодирует base64 из строки ``data`` начиная с позиции ``start``.
+
+    Строка декодируется порциями во временный файл на диске. У файла есть
+    temporary_file_path(), поэтому ImageField проверяет изображение с
+    диска, а не читает все байты в память.
+    """
+    output = DecodedImageFile(name, content_type, 0, None)
+    try:
+        for offset in range(start, len(data), BASE64_CHUNK_SIZE):
+            output.write(base64.b64decode(
+                data[offset:offset + BASE64_CHUNK_SIZE], validate=True))
+    except ValueError:
+        output.close()
+        raise
+    output.size = output.tell()
+    output.seek(0)
+    return output
+
+
+def is_processed(name):
+    return bool(PROCESSED_NAME.search(name))
+
+
+def variant_name(name, variant):
+    """Имя файла варианта обработанного изображения.
+
+    Для необработанных файлов и ``variant=None`` возвращается исходное имя.
+    """
+    if not variant or not is_processed(name):
+        return name
+    return f'{name[:-len(IMAGE_EXTENSION) - 1]}.{variant}.{IMAGE_EXTENSION}'
+
+
+def build_image_url(request, image, variant=None):
+    """Абсолютный адрес изображения или его варианта."""
+    if not image:
+        return None
+    url = image.storage.url(variant_name(image.name, variant))
+    return request.build_absolute_uri(url) if request else url
+
+
+def prepare(image):
+    """Учитывает поворот из EXIF и приводит к RGB/RGBA."""
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert(
+            'RGBA' if image.mode in ('LA', 'P', 'PA') else 'RGB')
+    return image
+
+
+def encode(image, max_dimension):
+    """Уменьшает копию до ``max_dimension`` по большей стороне и
+    сохраняет её в IMAGE_FORMAT без метаданных."""
+    image = image.copy()
+    image.thumbnail((max_dimension, max_dimension))
+    buffer = BytesIO()
+    image.save(buffer, IMAGE_FORMAT, quality=IMAGE_QUALITY)
+    return buffer.getvalue()
+
+
+def save_variants(storage, name, image, variants):
+    for variant, max_dimension in variants.items():
+        path = variant_name(name, variant)
+        if not storage.exists(path):
+            storage.save(path, ContentFile(encode(image, max_dimension)))
+
+
+def process_image(model, pk, field_name, name, variants):
+    """Заменяет загруженный файл оптимизированной копией и её вариантами.
+
+    Имя копии — хэш её содержимого, поэтому адреса копии и вариантов
+    никогда не меняют содержимое. Варианты сохраняются до обновления поля,
+    а само поле обновляется, только если за время обработки в нём
+    не появился другой файл. Для уже обработанного файла досоздаются
+    недостающие варианты.
+    """
+    storage = model._meta.get_field(field_name).storage
+    try:
+        with storage.open(name) as source, Image.open(source) as original:
+            image = prepare(original)
+            if is_processed(name):
+                save_variants(storage, name, image, variants)
+                return
+            content = encode(image, MAX_IMAGE_DIMENSION)
+            new_name = (f'{os.path.dirname(name)}/'
+                        f'{sha256(content).hexdigest()[:16]}.'
+                        f'{IMAGE_EXTENSION}')
+            existed = storage.exists(new_name)
+            if not existed:
+                new_name = storage.save(new_name, ContentFile(content))
+            save_variants(storage, new_name, image, variants)
+        updated = model.objects.filter(
+            pk=pk, **{field_name: name}).update(**{field_name: new_name})
+        if updated:
+            storage.delete(name)
+            image_processed.send(sender=model, pk=pk, field_name=field_name)
+        elif not existed:
+            storage.delete(new_name)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+    finally:
+        if settings.IMAGE_PROCESSING_ASYNC:
+            connection.close()
+
+
+def schedule_image_processing(instance, field_name, variants):
+    """Ставит обработку нового изображения в очередь после коммита."""
+    name = getattr(instance, field_name).name
+    if not name or is_processed(name):
+        return
+    args = (type(instance), instance.pk, field_name, name, variants)
+    if settings.IMAGE_PROCESSING_ASYNC:
+        transaction.on_commit(lambda: executor.submit(process_image, *args))
+    else:
+        transaction.on_commit(lambda: process_image(*args))
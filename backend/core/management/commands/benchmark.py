@@ -0,0 +1,165 @@
+import json
+import random
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from time import perf_counter
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe
+
+User = get_user_model()
+
+# (имя, шаблон адреса, нужен ли токен)
+ENDPOINTS = (
+    ('recipes-list', '/api/recipes/?page=1', False),
+    ('recipes-feed', '/api/recipes/', False),
+    ('recipes-tags', '/api/recipes/?tags=breakfast&tags=dinner', False),
+    ('recipes-favorited', '/api/recipes/?is_favorited=1', True),
+    ('recipe-detail', '/api/recipes/{recipe}/', False),
+    ('tags', '/api/tags/', False),
+    ('ingredients-search', '/api/ingredients/?name={prefix}', False),
+    ('subscriptions', '/api/users/subscriptions/?recipes_limit=3', True),
+    ('download-shopping-cart', '/api/recipes/download_shopping_cart/', True),
+)
+
+
+def percentile(values, percent):
+    if len(values) < 2:
+        return values[0] if values else None
+    return statistics.quantiles(values, n=100, method='inclusive')[
+        percent - 1]
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный прогон основных эндпоинтов: задержки p50/p95/p99, '
+            'пропускная способность и число SQL-запросов на запрос')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Запросов на каждый эндпоинт.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--base-url',
+            help='Адрес запущенного сервера. Без него запросы выполняются '
+                 'в процессе через тестовый клиент, и считаются SQL-запросы.')
+        parser.add_argument('--user',
+                            help='Email пользователя для запросов с токеном.')
+        parser.add_argument('--endpoint', action='append',
+                            help='Прогнать только указанные эндпоинты.')
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+
+    def handle(self, *args, **options):
+        user = (User.objects.filter(email=options['user']).first()
+                if options['user'] else
+                User.objects.filter(favorite__isnull=False)
+                .order_by('pk').first())
+        if user is None:
+            raise CommandError('Нет пользователя для запросов с токеном, '
+                               'сначала выполните generate_data.')
+        self.token = Token.objects.get_or_create(user=user)[0].key
+        self.base_url = options['base_url']
+        recipe_ids = list(Recipe.objects.order_by('-pk')
+                          .values_list('pk', flat=True)[:1000])
+        prefixes = [name[:2] for name in Ingredient.objects.order_by('?')
+                    .values_list('name', flat=True)[:100]] or ['а']
+        if not recipe_ids:
+            raise CommandError('Нет рецептов, сначала выполните '
+                               'generate_data.')
+
+        results = {}
+        for name, template, authorized in ENDPOINTS:
+            if options['endpoint'] and name not in options['endpoint']:
+                continue
+            urls = [template.format(recipe=random.choice(recipe_ids),
+                                    prefix=random.choice(prefixes))
+                    for _ in range(options['requests'])]
+            results[name] = self.run(urls, authorized,
+                                     options['concurrency'])
+            self.print_result(name, results[name])
+
+        report = {
+            'commit': self.commit(),
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'base_url': self.base_url,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'endpoints': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Результаты сохранены в {options["output"]}')
+
+    def run(self, urls, authorized, concurrency):
+        started = perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(
+                lambda url: self.request(url, authorized), urls))
+        elapsed = perf_counter() - started
+        latencies = sorted(sample[0] for sample in samples)
+        queries = [sample[2] for sample in samples if sample[2] is not None]
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for sample in samples if sample[1] >= 400),
+            'throughput_rps': round(len(samples) / elapsed, 1),
+            'mean_ms': round(statistics.fmean(latencies), 2),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'queries_per_request': (round(statistics.fmean(queries), 2)
+                                    if queries else None),
+        }
+
+    def request(self, url, authorized):
+        """Возвращает (задержку в мс, код ответа, число SQL-запросов)."""
+        headers = ({'Authorization': f'Token {self.token}'}
+                   if authorized else {})
+        if self.base_url:
+            started = perf_counter()
+            try:
+                with urlopen(Request(self.base_url.rstrip('/') + url,
+                                     headers=headers)) as response:
+                    response.read()
+                    status = response.status
+            except HTTPError as error:
+                status = error.code
+            return (perf_counter() - started) * 1000, status, None
+
+        client = Client(HTTP_HOST='localhost')
+        try:
+            with CaptureQueriesContext(connection) as context:
+                started = perf_counter()
+                response = client.get(url, headers=headers)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                latency = (perf_counter() - started) * 1000
+        finally:
+            connection.close()
+        return latency, response.status_code, len(context)
+
+    def print_result(self, name, result):
+        self.stdout.write(
+            f'{name:<24} p50 {result["p50_ms"]:>8} мс  '
+            f'p95 {result["p95_ms"]:>8} мс  p99 {result["p99_ms"]:>8} мс  '
+            f'{result["throughput_rps"]:>7} rps  '
+            f'SQL/запрос {result["queries_per_request"]}  '
+            f'ошибок {result["errors"]}')
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ('git', 'rev-parse', '--short', 'HEAD'), capture_output=True,
+                text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.images import process_image
+from recipes.constants import RECIPE_IMAGE_VARIANTS
+from recipes.models import Recipe
+from users.constants import AVATAR_VARIANTS
+
+User = get_user_model()
+
+IMAGE_FIELDS = (
+    (Recipe, 'image', RECIPE_IMAGE_VARIANTS),
+    (User, 'avatar', AVATAR_VARIANTS),
+)
+
+
+class Command(BaseCommand):
+    help = ('Пересжатие загруженных изображений и создание недостающих '
+            'вариантов (миниатюр)')
+
+    def handle(self, *args, **options):
+        for model, field_name, variants in IMAGE_FIELDS:
+            images = (model.objects.exclude(**{field_name: ''})
+                      .exclude(**{f'{field_name}__isnull': True})
+                      .values_list('pk', field_name))
+            count = 0
+            for pk, name in images.iterator():
+                process_image(model, pk, field_name, name, variants)
+                count += 1
+            self.stdout.write(f'{model._meta.verbose_name_plural}: '
+                              f'обработано изображений {count}')
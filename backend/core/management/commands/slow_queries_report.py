@@ -0,0 +1,66 @@
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Сводка журнала медленных SQL-запросов: запросы с наибольшим '
+            'суммарным временем')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=str(settings.SLOW_QUERY_LOG),
+                            help='Журнал; ротированные копии '
+                                 '(.1, .2, ...) читаются тоже.')
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--plans', action='store_true',
+                            help='Показать последний сохранённый план.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        files = sorted(path.parent.glob(f'{path.name}.*'), reverse=True)
+        files = [file for file in files if file.suffix[1:].isdigit()]
+        if path.exists():
+            files.append(path)
+        if not files:
+            raise CommandError(f'Журнал не найден: {path}')
+
+        statements = defaultdict(lambda: {
+            'count': 0, 'total_ms': 0, 'max_ms': 0, 'routes': set(),
+            'location': None, 'plan': None})
+        for file in files:
+            with open(file, encoding='utf-8') as lines:
+                for line in lines:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    stats = statements[entry['sql']]
+                    stats['count'] += 1
+                    stats['total_ms'] += entry['duration_ms']
+                    stats['max_ms'] = max(stats['max_ms'],
+                                          entry['duration_ms'])
+                    if entry.get('endpoint'):
+                        stats['routes'].add(entry['endpoint']['route'])
+                    stats['location'] = entry.get('location')
+                    if entry.get('plan') is not None:
+                        stats['plan'] = entry['plan']
+
+        worst = sorted(statements.items(), key=lambda item: -item[1][
+            'total_ms'])[:options['limit']]
+        for number, (sql, stats) in enumerate(worst, 1):
+            self.stdout.write(
+                f'{number}. всего {stats["total_ms"]:.0f} мс, '
+                f'раз {stats["count"]}, '
+                f'в среднем {stats["total_ms"] / stats["count"]:.1f} мс, '
+                f'максимум {stats["max_ms"]:.1f} мс')
+            routes = ', '.join(sorted(str(route)
+                                      for route in stats['routes']))
+            self.stdout.write(f'   маршруты: {routes or "-"}')
+            self.stdout.write(f'   вызов: {stats["location"] or "-"}')
+            self.stdout.write(f'   {sql}')
+            if options['plans'] and stats['plan'] is not None:
+                self.stdout.write(json.dumps(stats['plan'],
+                                             ensure_ascii=False, indent=2))
@@ -0,0 +1,154 @@
+"""Метрики запросов в памяти процесса в формате Prometheus."""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from threading import Lock
+from time import perf_counter
+
+from core.constants import METRICS_LATENCY_BUCKETS
+
+# Метрики текущего запроса; None, если запрос не попал в выборку.
+current_request = ContextVar('current_request', default=None)
+
+
+@dataclass
+class RequestMetrics:
+    queries: int = 0
+    sql_seconds: float = 0
+    serialization_seconds: float = 0
+    serializing: bool = False
+
+
+@contextmanager
+def serialization():
+    """Учитывает время блока как сериализацию ответа.
+
+    Вложенные блоки (сериализатор внутри сериализатора) входят во время
+    внешнего и отдельно не суммируются.
+    """
+    metrics = current_request.get()
+    if metrics is None or metrics.serializing:
+        yield
+        return
+    metrics.serializing = True
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializing = False
+        metrics.serialization_seconds += perf_counter() - started
+
+
+def sql_metrics_wrapper(execute, sql, params, many, context):
+    """Считает запросы и их время в метриках текущего запроса.
+
+    Метрики берутся из контекстной переменной, поэтому учитываются и
+    запросы асинхронных представлений, выполняемые в потоках sync_to_async.
+    """
+    metrics = current_request.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_seconds += perf_counter() - started
+
+
+def install(connection, **kwargs):
+    """Подключает обёртку к каждому новому соединению с базой."""
+    if sql_metrics_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_metrics_wrapper)
+
+
+@dataclass
+class Series:
+    buckets: list = field(
+        default_factory=lambda: [0] * (len(METRICS_LATENCY_BUCKETS) + 1))
+    requests: int = 0
+    seconds: float = 0
+    queries: int = 0
+    sql_seconds: float = 0
+    serialization_seconds: float = 0
+    response_bytes: int = 0
+
+
+class Registry:
+    """Агрегирует метрики по (маршрут, метод, класс кода ответа).
+
+    Дополнительные показатели (например, статистика кэшей) подключаются
+    через ``register_collector``: функция возвращает строки в формате
+    Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._series = {}
+        self._collectors = []
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+        return collector
+
+    def record(self, route, method, status, seconds, request_metrics,
+               response_bytes):
+        key = (route, method, f'{status // 100}xx')
+        bucket = bisect_left(METRICS_LATENCY_BUCKETS, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = Series()
+            series.buckets[bucket] += 1
+            series.requests += 1
+            series.seconds += seconds
+            series.queries += request_metrics.queries
+            series.sql_seconds += request_metrics.sql_seconds
+            series.serialization_seconds += (
+                request_metrics.serialization_seconds)
+            series.response_bytes += response_bytes
+
+    def render(self):
+        with self._lock:
+            snapshot = {key: Series(list(series.buckets), series.requests,
+                                    series.seconds, series.queries,
+                                    series.sql_seconds,
+                                    series.serialization_seconds,
+                                    series.response_bytes)
+                        for key, series in self._series.items()}
+        lines = [
+            '# TYPE foodgram_http_request_duration_seconds histogram',
+        ]
+        for (route, method, status), series in sorted(snapshot.items()):
+            labels = f'route="{route}",method="{method}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(METRICS_LATENCY_BUCKETS, series.buckets):
+                cumulative += count
+                lines.append(f'foodgram_http_request_duration_seconds_bucket'
+                             f'{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'foodgram_http_request_duration_seconds_bucket'
+                         f'{{{labels},le="+Inf"}} {series.requests}')
+            lines.append(f'foodgram_http_request_duration_seconds_sum'
+                         f'{{{labels}}} {series.seconds:.6f}')
+            lines.append(f'foodgram_http_request_duration_seconds_count'
+                         f'{{{labels}}} {series.requests}')
+        for name, attribute, kind in (
+            ('foodgram_http_sql_queries_total', 'queries', 'counter'),
+            ('foodgram_http_sql_seconds_total', 'sql_seconds', 'counter'),
+            ('foodgram_http_serialization_seconds_total',
+             'serialization_seconds', 'counter'),
+            ('foodgram_http_response_bytes_total', 'response_bytes',
+             'counter'),
+        ):
+            lines.append(f'# TYPE {name} {kind}')
+            for (route, method, status), series in sorted(snapshot.items()):
+                value = getattr(series, attribute)
+                lines.append(f'{name}{{route="{route}",method="{method}",'
+                             f'status="{status}"}} {value:g}')
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
@@ -0,0 +1,150 @@
+from hashlib import sha256
+from random import random
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+
+from core.constants import (REPLICA_PIN_COOKIE, REPLICA_PIN_KEY,
+                            REPLICA_READ_ROUTES)
+from core.db_router import replica_reads
+from core.metrics import RequestMetrics, current_request, registry
+from core.slow_queries import current_http_request
+
+
+class ContextMiddleware:
+    """Основа промежуточных слоёв, работающих и под WSGI, и под ASGI.
+
+    Подклассы реализуют ``enter(request)``, возвращающий состояние, и
+    ``finish(request, response, state)``; ответ получается синхронно или
+    асинхронно в зависимости от цепочки обработчиков.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.enter(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.leave(state)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.enter(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.leave(state)
+        return self.finish(request, response, state)
+
+    def enter(self, request):
+        raise NotImplementedError
+
+    def leave(self, state):
+        """Вызывается и при исключении в обработчике."""
+
+    def finish(self, request, response, state):
+        return response
+
+
+class MetricsMiddleware(ContextMiddleware):
+    """Измеряет время ответа, SQL-запросы и размер ответа по маршрутам.
+
+    Измеряется доля запросов METRICS_SAMPLE_RATE; остальные проходят
+    без учёта.
+    """
+
+    def enter(self, request):
+        if not settings.METRICS_ENABLED or (
+                random() >= settings.METRICS_SAMPLE_RATE):
+            return None
+        metrics = RequestMetrics()
+        return metrics, current_request.set(metrics), perf_counter()
+
+    def leave(self, state):
+        if state is not None:
+            current_request.reset(state[1])
+
+    def finish(self, request, response, state):
+        if state is None:
+            return response
+        metrics, _, started = state
+        match = request.resolver_match
+        registry.record(
+            match.view_name if match else 'unmatched', request.method,
+            response.status_code, perf_counter() - started, metrics,
+            0 if response.streaming else len(response.content))
+        return response
+
+
+class SlowQueryMiddleware(ContextMiddleware):
+    """Делает текущий запрос доступным журналу медленных SQL-запросов."""
+
+    def enter(self, request):
+        return current_http_request.set(request)
+
+    def leave(self, state):
+        current_http_request.reset(state)
+
+
+class ReplicaMiddleware(ContextMiddleware):
+    """Разрешает читать с реплик на безопасных маршрутах.
+
+    После успешной записи клиент на REPLICA_PIN_SECONDS закрепляется за
+    основной базой, чтобы видеть свои изменения: браузер — по cookie,
+    клиенты API — по ключу в общем кэше от заголовка Authorization.
+    """
+
+    def enter(self, request):
+        if not settings.DATABASE_REPLICAS or not self.replica_safe(request):
+            return None
+        return replica_reads.set(True)
+
+    def leave(self, state):
+        if state is not None:
+            replica_reads.reset(state)
+
+    def finish(self, request, response, state):
+        if (settings.DATABASE_REPLICAS
+                and request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and response.status_code < 400):
+            response.set_cookie(REPLICA_PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+            key = self.pin_key(request)
+            if key:
+                cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def replica_safe(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if REPLICA_PIN_COOKIE in request.COOKIES:
+            return False
+        try:
+            match = resolve(request.path_info,
+                            getattr(request, 'urlconf', None))
+        except Resolver404:
+            return False
+        if match.view_name not in REPLICA_READ_ROUTES:
+            return False
+        key = self.pin_key(request)
+        return not (key and cache.get(key))
+
+    @staticmethod
+    def pin_key(request):
+        authorization = request.headers.get('Authorization')
+        if authorization:
+            return REPLICA_PIN_KEY.format(
+                sha256(authorization.encode()).hexdigest())
+        return None
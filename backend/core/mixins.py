@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.cache import LRUCache, get_data_version
+from core.constants import REFERENCE_CACHE_MAX_AGE, REFERENCE_CACHE_MAX_ENTRIES
+from core.db_router import primary
+from core.metrics import registry
+
+payloads = LRUCache(REFERENCE_CACHE_MAX_ENTRIES)
+anonymous_payloads = LRUCache(settings.ANONYMOUS_CACHE_MAX_ENTRIES)
+
+
+@registry.register_collector
+def response_cache_stats():
+    lines = []
+    for name, kind in (('entries', 'gauge'), ('hits', 'counter'),
+                       ('misses', 'counter')):
+        metric = f'foodgram_response_cache_{name}'
+        if kind == 'counter':
+            metric += '_total'
+        lines.append(f'# TYPE {metric} {kind}')
+        for cache_name, cache in (('reference', payloads),
+                                  ('anonymous', anonymous_payloads)):
+            lines.append(f'{metric}{{cache="{cache_name}"}} '
+                         f'{cache.stats()[name]}')
+    return lines
+
+
+def normalized_params(query_params):
+    """Параметры запроса в виде, не зависящем от их порядка."""
+    return tuple(sorted(
+        (name, tuple(sorted(value for value in values if value)))
+        for name, values in query_params.lists()
+    ))
+
+
+def payload_key(namespace, version, action, kwargs, query_params,
+                host=None):
+    """Ключ сериализованного ответа в кэше процесса."""
+    return (namespace, version, host, action, tuple(sorted(kwargs.items())),
+            normalized_params(query_params))
+
+
+def reference_etag(namespace, version, renderer_format):
+    return f'"{namespace}-{version}-{renderer_format}"'
+
+
+def etag_matches(request, etag):
+    """Совпадает ли ETag с заголовком If-None-Match запроса."""
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    return etag in if_none_match or '*' in if_none_match
+
+
+def patch_reference_headers(response, etag, max_age):
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=max_age)
+    patch_vary_headers(response, ('Accept',))
+
+
+class VersionedCacheMixin:
+    """Кэширует сериализованные ответы list/retrieve по версии данных.
+
+    Версия набора данных ``cache_namespace`` меняется сигналами при любой
+    записи. Пока версия та же, ответ берётся из памяти процесса, а на
+    условные запросы с совпадающим ETag отдаётся 304 Not Modified.
+    Кэшируемый ответ строится по основной базе, а не по реплике.
+    """
+    cache_namespace = None
+    cache_max_age = REFERENCE_CACHE_MAX_AGE
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned_response(super().list, request,
+                                       *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned_response(super().retrieve, request,
+                                       *args, **kwargs)
+
+    def versioned_response(self, handler, request, *args, **kwargs):
+        version = get_data_version(self.cache_namespace)
+        etag = reference_etag(self.cache_namespace, version,
+                              request.accepted_renderer.format)
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = payload_key(self.cache_namespace, version, self.action,
+                              kwargs, request.query_params)
+            data = payloads.get(key)
+            if data is None:
+                with primary():
+                    response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                payloads.set(key, response.data)
+            else:
+                response = Response(data)
+        patch_reference_headers(response, etag, self.cache_max_age)
+        return response
+
+
+class AnonymousCacheMixin:
+    """Кэширует ответы list/retrieve для анонимных пользователей.
+
+    Анонимам всем отдаются одинаковые данные, поэтому сериализованный ответ
+    хранится по версии набора данных ``cache_namespace``, адресу сайта
+    и нормализованным параметрам запроса. Записи вытесняются по LRU,
+    размер кэша задаётся настройкой ANONYMOUS_CACHE_MAX_ENTRIES.
+    """
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.anonymous_response(super().list, request,
+                                       *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.anonymous_response(super().retrieve, request,
+                                       *args, **kwargs)
+
+    def anonymous_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = payload_key(self.cache_namespace,
+                          get_data_version(self.cache_namespace), self.action,
+                          kwargs, request.query_params,
+                          host=request.get_host())
+        data = anonymous_payloads.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        with primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            anonymous_payloads.set(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,15 @@
+from rest_framework.renderers import JSONRenderer
+
+from core.metrics import serialization
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer, учитывающий время кодирования JSON в метриках запроса.
+
+    Время получения ``serializer.data`` учитывает TimedDataMixin.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serialization():
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
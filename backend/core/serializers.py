@@ -1,14 +1,69 @@
-import base64
-
-from django.core.files.base import ContentFile
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
+from core.constants import MAX_IMAGE_PIXELS, MAX_IMAGE_UPLOAD_SIZE
+from core.images import build_image_url, decode_base64
+from core.metrics import serialization
+
+BASE64_MARKER = ';base64,'
+
+
+class TimedDataMixin:
+    """Учитывает время получения ``data`` в метриках запроса.
+
+    Для списков (many=True) в Meta сериализатора указывается
+    ``list_serializer_class = TimedListSerializer``.
+    """
+
+    @property
+    def data(self):
+        with serialization():
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    pass
+
 
 class Base64ImageField(serializers.ImageField):
+    """Изображение в base64 на входе, адрес файла или его варианта на выходе.
+
+    Вариант задаётся аргументом ``variant`` или, для конкретного поля,
+    словарём ``image_variants`` в контексте сериализатора.
+    """
+    default_error_messages = {
+        'too_large': _('Изображение больше {max_size} МБ.'),
+        'too_many_pixels': _('Изображение больше {max_pixels} пикселей.'),
+    }
+
+    def __init__(self, *args, variant=None, **kwargs):
+        self.variant = variant
+        super().__init__(*args, **kwargs)
+
+    def to_representation(self, value):
+        variant = self.context.get('image_variants', {}).get(
+            self.field_name, self.variant)
+        return build_image_url(self.context.get('request'), value, variant)
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            start = data.find(BASE64_MARKER)
+            if start == -1:
+                self.fail('invalid_image')
+            start += len(BASE64_MARKER)
+            if (len(data) - start) * 3 // 4 > MAX_IMAGE_UPLOAD_SIZE:
+                self.fail('too_large',
+                          max_size=MAX_IMAGE_UPLOAD_SIZE // (1024 * 1024))
+            content_type = data[len('data:'):start].split(';')[0]
+            ext = content_type.split('/')[-1]
+            try:
+                data = decode_base64(data, start, 'temp.' + ext,
+                                     content_type)
+            except ValueError:
+                self.fail('invalid_image')
 
-        return super().to_internal_value(data)
+        image_file = super().to_internal_value(data)
+        image = getattr(image_file, 'image', None)
+        if image and image.width * image.height > MAX_IMAGE_PIXELS:
+            self.fail('too_many_pixels', max_pixels=MAX_IMAGE_PIXELS)
+        return image_file
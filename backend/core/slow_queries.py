@@ -0,0 +1,103 @@
+"""Запись медленных SQL-запросов с планами выполнения."""
+import json
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from random import random
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('foodgram.slow_queries')
+
+# HTTP-запрос, в рамках которого выполняется SQL.
+current_http_request = ContextVar('current_http_request', default=None)
+
+executor = ThreadPoolExecutor(max_workers=1,
+                              thread_name_prefix='slow-query-explain')
+
+EXPLAIN_PREFIXES = {
+    'postgresql': 'EXPLAIN (ANALYZE off, FORMAT JSON) ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+# Кадры стека из этих каталогов пропускаются при поиске места вызова.
+SKIPPED_FRAMES = ('/django/', '/rest_framework/', '/djoser/',
+                  '/django_filters/', 'site-packages', __file__)
+
+
+def endpoint():
+    request = current_http_request.get()
+    if request is None:
+        return None
+    match = request.resolver_match
+    return {'method': request.method, 'path': request.path,
+            'route': match.view_name if match else None}
+
+
+def location():
+    """Ближайший к запросу кадр стека из кода проекта."""
+    for frame in reversed(traceback.extract_stack()):
+        if not any(part in frame.filename for part in SKIPPED_FRAMES):
+            return f'{frame.filename}:{frame.lineno} in {frame.name}'
+    return None
+
+
+def explain(alias, sql, params):
+    vendor = connections[alias].vendor
+    prefix = EXPLAIN_PREFIXES.get(vendor)
+    if prefix is None:
+        return None
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+        if vendor == 'postgresql':
+            return rows[0][0]
+        return [row[-1] for row in rows]
+    finally:
+        connections[alias].close()
+
+
+def write(entry, alias=None, explain_sql=None):
+    if explain_sql is not None:
+        try:
+            entry['plan'] = explain(alias, *explain_sql)
+        except Exception as error:
+            entry['plan_error'] = str(error)
+    logger.warning(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    """Обёртка для execute_wrappers: пишет запросы дольше порога."""
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (perf_counter() - started) * 1000
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is not None and duration_ms >= threshold and (
+                not sql.startswith('EXPLAIN')):
+            alias = context['connection'].alias
+            entry = {
+                'time': datetime.now(timezone.utc).isoformat(),
+                'duration_ms': round(duration_ms, 3),
+                'database': alias,
+                'sql': sql,
+                'params': None if many else params,
+                'endpoint': endpoint(),
+                'location': location(),
+            }
+            if not many and sql.lstrip().upper().startswith('SELECT') and (
+                    random() < settings.SLOW_QUERY_EXPLAIN_RATE):
+                executor.submit(write, entry, alias, (sql, params))
+            else:
+                write(entry)
+
+
+def install(connection, **kwargs):
+    """Подключает обёртку к каждому новому соединению с базой."""
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
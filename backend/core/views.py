@@ -1,45 +1,140 @@
-from io import BytesIO
+import csv
+import json
 
-from django.http import FileResponse
+from django.conf import settings
+from django.db.models import Sum
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Sum
 
-from recipes.models import IngredientRecipe, ShoppingCart
+from core.constants import (SHOPPING_CART_CURSOR_CHUNK_SIZE,
+                            SHOPPING_CART_FILENAME,
+                            SHOPPING_CART_LINES_PER_CHUNK)
+from core.metrics import registry
+from recipes.models import IngredientRecipe
 
 pdfmetrics.registerFont(TTFont('Arial',
                                'core/fonts/ArialRegular.ttf'))
 
 
+class LineBuffer:
+    """Псевдо-файл для csv.writer: возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def text_line(number, ingredient):
+    return (f"{number}. {ingredient['ingredient__name']}: "
+            f"{ingredient['total_amount']} "
+            f"{ingredient['ingredient__measurement_unit']}\n")
+
+
+def csv_line(number, ingredient):
+    return csv.writer(LineBuffer()).writerow((
+        ingredient['ingredient__name'], ingredient['total_amount'],
+        ingredient['ingredient__measurement_unit']))
+
+
+def json_line(number, ingredient):
+    return json.dumps({
+        'name': ingredient['ingredient__name'],
+        'amount': ingredient['total_amount'],
+        'measurement_unit': ingredient['ingredient__measurement_unit'],
+    }, ensure_ascii=False) + '\n'
+
+
+# формат: (заголовок, строка ингредиента, Content-Type)
+SHOPPING_CART_FORMATS = {
+    'txt': ('Список ингредиентов:\n', text_line,
+            'text/plain; charset=utf-8'),
+    'csv': (csv.writer(LineBuffer()).writerow(
+        ('name', 'amount', 'measurement_unit')), csv_line,
+        'text/csv; charset=utf-8'),
+    'jsonl': ('', json_line, 'application/jsonl; charset=utf-8'),
+}
+
+
+def shopping_cart_ingredients(user):
+    """Суммы ингредиентов из корзины пользователя."""
+    return IngredientRecipe.objects.filter(
+        recipe__shopping_cart__user=user
+    ).values(
+        'ingredient__name', 'ingredient__measurement_unit'
+    ).annotate(
+        total_amount=Sum('amount')
+    ).order_by('ingredient__name', 'ingredient__measurement_unit')
+
+
+def shopping_cart_format_error():
+    return {'file_format': f'Доступные форматы: '
+                           f'{", ".join(SHOPPING_CART_FORMATS)}.'}
+
+
+def shopping_cart_lines(header, line, ingredients):
+    if header:
+        yield header
+    for number, ingredient in enumerate(ingredients, 1):
+        yield line(number, ingredient)
+
+
+def chunked(lines, size=SHOPPING_CART_LINES_PER_CHUNK):
+    """Склеивает строки в блоки, чтобы не отправлять их по одной."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def shopping_cart_response(streaming_content, file_format):
+    response = StreamingHttpResponse(
+        streaming_content, content_type=SHOPPING_CART_FORMATS[file_format][2])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{SHOPPING_CART_FILENAME}.{file_format}"')
+    return response
+
+
 class DownloadShopCartView(APIView):
-    """Функция создает список покупок в текстовый файл."""
+    """Функция создает список покупок в текстовый файл.
+
+    Список отдаётся потоком прямо из серверного курсора по агрегированному
+    запросу, формат выбирается параметром ``file_format``: txt, csv, jsonl.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        user = request.user
-        shopping_cart_items = ShoppingCart.objects.filter(
-            user=user).values_list('recipe', flat=True)
-
-        ingredients = IngredientRecipe.objects.filter(
-            recipe__in=shopping_cart_items
-        ).values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(
-            total_amount=Sum('amount')
-        )
-
-        lines = ['Список ингредиентов:\n']
-        for count, ingredient in enumerate(ingredients, 1):
-            lines.append(
-                f"{count}. {ingredient['ingredient__name']}: "
-                f"{ingredient['total_amount']} "
-                f"{ingredient['ingredient__measurement_unit']}\n"
-            )
-
-        buffer = BytesIO()
-        buffer.write(''.join(lines).encode('utf-8'))
-        buffer.seek(0)
-        return FileResponse(buffer, as_attachment=True,
-                            filename='shopping_cart.txt')
+        file_format = request.query_params.get('file_format', 'txt')
+        if file_format not in SHOPPING_CART_FORMATS:
+            return Response(shopping_cart_format_error(),
+                            status=status.HTTP_400_BAD_REQUEST)
+        header, line, _ = SHOPPING_CART_FORMATS[file_format]
+        ingredients = shopping_cart_ingredients(request.user).iterator(
+            chunk_size=SHOPPING_CART_CURSOR_CHUNK_SIZE)
+        return shopping_cart_response(
+            chunked(shopping_cart_lines(header, line, ingredients)),
+            file_format)
+
+
+def metrics_view(request):
+    """Метрики процесса в текстовом формате Prometheus.
+
+    Доступны только с заголовком ``Authorization: Bearer <METRICS_TOKEN>``;
+    без настроенного токена адрес не существует.
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    if not constant_time_compare(request.headers.get('Authorization', ''),
+                                 f'Bearer {settings.METRICS_TOKEN}'):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
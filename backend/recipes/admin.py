@@ -50,9 +50,13 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ('tags',)
     empty_value_display = 'Не задано'
     inlines = [IngredientRecipeInline, TagRecipeInline]
+    list_select_related = ('author',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('tags')
 
     def get_favorite_count(self, obj):
-        return obj.favorite_count()
+        return obj.favorites_count
 
     def display_tags(self, obj):
         return ", ".join(tag.name for tag in obj.tags.all())
@@ -0,0 +1,105 @@
+"""Асинхронные версии читающих эндпоинтов рецептов, тэгов и ингредиентов.
+
+Подключаются в backend/asgi_urls.py; ответы и ключи кэшей совпадают
+с синхронными представлениями из recipes/views.py.
+"""
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+
+from core.async_views import (anonymous_response, drf_request, error_response,
+                              json_response, not_found,
+                              versioned_response)
+from recipes.filters import RecipeFilter
+from recipes.ingredient_index import ingredient_index
+from recipes.views import recipe_paginator, recipes_for, short_link_redirect
+from .constants import INGREDIENTS_VERSION, RECIPES_VERSION, TAGS_VERSION
+from .models import Ingredient, Recipe, Tag
+from .serializers import (IngredientSerializer, RecipeGetSerializer,
+                          TagSerializer)
+
+
+def recipe_page(request):
+    """Страница списка рецептов: фильтры, пагинация и сериализация.
+
+    Пагинаторы DRF синхронные, поэтому страница собирается в потоке
+    sync_to_async, отдельном для каждого запроса.
+    """
+    wrapped = drf_request(request)
+    filterset = RecipeFilter(request.GET, queryset=recipes_for(request.user),
+                             request=wrapped)
+    if not filterset.is_valid():
+        return json_response(filterset.errors, status.HTTP_400_BAD_REQUEST)
+    paginator = recipe_paginator(request.GET)
+    try:
+        page = paginator.paginate_queryset(filterset.qs, wrapped)
+    except NotFound as error:
+        return error_response(error)
+    serializer = RecipeGetSerializer(
+        page, many=True, context={'request': wrapped,
+                                  'image_variants': {'image': 'card'}})
+    return json_response(
+        paginator.get_paginated_response(serializer.data).data)
+
+
+async def recipe_list(request):
+    return await anonymous_response(
+        request, RECIPES_VERSION, 'list', {},
+        lambda: sync_to_async(recipe_page)(request))
+
+
+async def recipe_detail(request, pk):
+    async def load():
+        recipe = await recipes_for(request.user).filter(pk=pk).afirst()
+        if recipe is None:
+            return not_found(Recipe)
+        return json_response(RecipeGetSerializer(
+            recipe, context={'request': drf_request(request)}).data)
+
+    return await anonymous_response(request, RECIPES_VERSION, 'retrieve',
+                                    {'pk': str(pk)}, load)
+
+
+async def tag_list(request):
+    async def load():
+        tags = [tag async for tag in Tag.objects.all()]
+        return json_response(TagSerializer(tags, many=True).data)
+
+    return await versioned_response(request, TAGS_VERSION, 'list', {}, load)
+
+
+async def tag_detail(request, pk):
+    async def load():
+        tag = await Tag.objects.filter(pk=pk).afirst()
+        if tag is None:
+            return not_found(Tag)
+        return json_response(TagSerializer(tag).data)
+
+    return await versioned_response(request, TAGS_VERSION, 'retrieve',
+                                    {'pk': str(pk)}, load)
+
+
+async def ingredient_list(request):
+    async def load():
+        ingredients = await sync_to_async(ingredient_index.search)(
+            request.GET.get('name') or request.GET.get('search'))
+        return json_response(
+            IngredientSerializer(ingredients, many=True).data)
+
+    return await versioned_response(request, INGREDIENTS_VERSION, 'list', {},
+                                    load)
+
+
+async def ingredient_detail(request, pk):
+    async def load():
+        ingredient = await Ingredient.objects.filter(pk=pk).afirst()
+        if ingredient is None:
+            return not_found(Ingredient)
+        return json_response(IngredientSerializer(ingredient).data)
+
+    return await versioned_response(request, INGREDIENTS_VERSION, 'retrieve',
+                                    {'pk': str(pk)}, load)
+
+
+async def recipe_redirect(request, short_id):
+    return short_link_redirect(short_id)
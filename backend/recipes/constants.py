@@ -5,3 +5,17 @@ MIN_TIME_COOKING = 1
 MIN_AMOUNT_INGRIDIENT = 1
 MAX_STR_INGRIDIENT_NAME = 128
 MAX_STR_MEASUEREMENT_UNIT = 64
+INGREDIENTS_VERSION = 'ingredients'
+TAGS_VERSION = 'tags'
+IMPORT_BATCH_SIZE = 1000
+RECIPE_IMAGE_VARIANTS = {'thumb': 240, 'card': 640}
+RECIPE_IDS_VERSION = 'recipe-ids'
+SHORT_CODE_MIN_LENGTH = 4
+SHORT_CODE_CACHE_SIZE = 65536
+SHORT_LINK_MAX_AGE = 60 * 60 * 24 * 30
+SEARCH_CONFIG = 'russian'
+SEARCH_BATCH_SIZE = 1000
+RECIPE_INGREDIENTS_VERSION = 'recipe-ingredients'
+MAX_MATCH_INGREDIENTS = 50
+FEED_BATCH_SIZE = 1000
+RECIPES_VERSION = 'recipes'
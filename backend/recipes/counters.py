@@ -0,0 +1,31 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def actual_count(model, field):
+    """Подзапрос с фактическим числом строк ``model``, ссылающихся на
+    текущую запись через ``field``."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count')
+        ),
+        Value(0),
+    )
+
+
+def repair_counter(queryset, counter, model, field, dry_run=False):
+    """Находит записи, у которых счётчик ``counter`` разошёлся с
+    фактическим количеством, и исправляет их одним UPDATE.
+
+    Возвращает количество исправленных записей.
+    """
+    drifted = queryset.alias(actual=actual_count(model, field)).exclude(
+        **{counter: F('actual')})
+    if dry_run:
+        return drifted.count()
+    return queryset.filter(pk__in=drifted.values('pk')).update(
+        **{counter: actual_count(model, field)})
@@ -0,0 +1,37 @@
+from itertools import islice
+
+from .constants import FEED_BATCH_SIZE
+from .models import FeedItem, Subscriptions
+
+
+def _insert(rows):
+    rows = iter(rows)
+    while batch := list(islice(rows, FEED_BATCH_SIZE)):
+        FeedItem.objects.bulk_create(
+            [FeedItem(user_id=user_id, recipe_id=recipe_id,
+                      created_at=created_at)
+             for user_id, recipe_id, created_at in batch],
+            ignore_conflicts=True)
+
+
+def fan_out(recipe):
+    """Добавляет новый рецепт в ленты всех подписчиков автора."""
+    _insert(
+        (user_id, recipe.pk, recipe.created_at)
+        for user_id in Subscriptions.objects.filter(
+            author_id=recipe.author_id).values_list(
+            'user_id', flat=True).iterator()
+    )
+
+
+def backfill(subscriptions):
+    """Добавляет в ленты подписчиков уже опубликованные рецепты авторов."""
+    _insert(subscriptions.filter(author__recipes__isnull=False).values_list(
+        'user_id', 'author__recipes__id', 'author__recipes__created_at'
+    ).iterator())
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты рецепты автора, от которого отписались."""
+    FeedItem.objects.filter(user_id=user_id,
+                            recipe__author_id=author_id).delete()
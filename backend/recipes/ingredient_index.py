@@ -0,0 +1,87 @@
+import re
+from bisect import bisect_left
+from threading import Lock
+
+from core.cache import get_data_version
+from core.db_router import primary
+from .constants import INGREDIENTS_VERSION
+from .models import Ingredient
+
+WORD_SEPARATOR = re.compile(r'[\s,()\-]+')
+
+
+def normalize(text):
+    """Приводит строку к виду для сравнения без учёта регистра и «ё»."""
+    return text.casefold().replace('ё', 'е').strip()
+
+
+class IngredientIndex:
+    """Префиксный индекс ингредиентов в памяти процесса.
+
+    Индекс строится лениво при первом обращении и пересобирается, когда
+    меняется версия данных ингредиентов. Ключи хранятся в отсортированном
+    массиве: поиск по префиксу — это бинарный поиск и последовательный
+    проход по совпавшему диапазону, без обращения к базе.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        self._ingredients = []
+        self._keys = []
+        self._entries = []
+
+    def _build(self, version):
+        ingredients = sorted(Ingredient.objects.all(),
+                             key=lambda item: (normalize(item.name), item.pk))
+        entries = []
+        for position, ingredient in enumerate(ingredients):
+            name = normalize(ingredient.name)
+            entries.append((name, 0, position))
+            for separator in WORD_SEPARATOR.finditer(name):
+                word = name[separator.end():]
+                if word:
+                    entries.append((word, 1, position))
+        entries.sort()
+        self._keys = [key for key, _, _ in entries]
+        self._entries = entries
+        self._ingredients = ingredients
+        self._version = version
+
+    def _refresh(self):
+        version = get_data_version(INGREDIENTS_VERSION)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    with primary():
+                        self._build(version)
+
+    def all(self):
+        self._refresh()
+        return list(self._ingredients)
+
+    def search(self, prefix):
+        """Ингредиенты, название или слово в названии которых начинается
+        с ``prefix``.
+
+        Сначала идут совпадения с началом названия, затем совпадения
+        с началом одного из слов; внутри групп — по алфавиту.
+        """
+        prefix = normalize(prefix or '')
+        if not prefix:
+            return self.all()
+        self._refresh()
+        keys, entries = self._keys, self._entries
+        ranks = {}
+        for index in range(bisect_left(keys, prefix), len(keys)):
+            key, rank, position = entries[index]
+            if not key.startswith(prefix):
+                break
+            ranks[position] = min(rank, ranks.get(position, rank))
+        ingredients = self._ingredients
+        return [ingredients[position] for position in
+                sorted(ranks, key=lambda position: (ranks[position],
+                                                    position))]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,169 @@
+import random
+from itertools import islice
+from time import perf_counter
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.cache import bump_data_version, publish_changes
+from recipes.constants import (RECIPE_IDS_VERSION, RECIPE_INGREDIENTS_VERSION,
+                               RECIPES_VERSION, TAGS_VERSION)
+from recipes.feed import backfill
+from recipes.models import (Favorite, FeedItem, Ingredient, IngredientRecipe,
+                            Recipe, ShoppingCart, Subscriptions, Tag,
+                            TagRecipe)
+
+User = get_user_model()
+
+PASSWORD = 'foodgram-benchmark'
+TAG_SLUGS = ('breakfast', 'lunch', 'dinner', 'dessert', 'vegan', 'quick')
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = ('Генерация синтетических данных для нагрузочного тестирования: '
+            'пользователи, рецепты, избранное, корзины и подписки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--tags-per-recipe', type=int, default=2)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--seed', type=int,
+            help='Зерно генератора случайных чисел для повторяемых данных.')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = uuid4().hex[:8]
+        started = perf_counter()
+
+        ingredient_ids = list(Ingredient.objects.values_list('pk', flat=True))
+        if len(ingredient_ids) < options['ingredients_per_recipe']:
+            raise CommandError('Недостаточно ингредиентов, сначала '
+                               'выполните import_csv.')
+        tag_ids = self.ensure_tags()
+
+        with transaction.atomic():
+            user_ids = self.create_users(options['users'])
+            recipe_ids = self.create_recipes(
+                options['recipes'], user_ids, tag_ids, ingredient_ids,
+                options['tags_per_recipe'], options['ingredients_per_recipe'])
+            self.create_relations(Favorite, 'recipe', user_ids, recipe_ids,
+                                  options['favorites_per_user'])
+            self.create_relations(ShoppingCart, 'recipe', user_ids,
+                                  recipe_ids, options['cart_per_user'])
+            self.create_relations(Subscriptions, 'author', user_ids,
+                                  user_ids, options['subscriptions_per_user'])
+            self.fill_feed()
+
+        call_command('recount_counters', stdout=self.stdout)
+        publish_changes(RECIPE_IDS_VERSION)
+        publish_changes(RECIPE_INGREDIENTS_VERSION)
+        bump_data_version(RECIPES_VERSION)
+        self.stdout.write(
+            f'Данные сгенерированы за {perf_counter() - started:.1f} с. '
+            f'Пароль пользователей: {PASSWORD}')
+
+    def report(self, label, count, started):
+        elapsed = perf_counter() - started
+        self.stdout.write(f'{label}: {count} '
+                          f'({count / elapsed if elapsed else 0:.0f} строк/с)')
+
+    def ensure_tags(self):
+        Tag.objects.bulk_create(
+            [Tag(name=slug, slug=slug) for slug in TAG_SLUGS],
+            ignore_conflicts=True)
+        bump_data_version(TAGS_VERSION)
+        return list(Tag.objects.values_list('pk', flat=True))
+
+    def create_users(self, count):
+        started = perf_counter()
+        password = make_password(PASSWORD)
+        user_ids = []
+        for batch in batched(range(count), self.batch_size):
+            users = User.objects.bulk_create(
+                User(username=f'bench-{self.prefix}-{number}',
+                     email=f'bench-{self.prefix}-{number}@example.com',
+                     first_name='Имя', last_name='Фамилия',
+                     password=password)
+                for number in batch
+            )
+            user_ids.extend(user.pk for user in users)
+        self.report('Пользователи', len(user_ids), started)
+        return user_ids
+
+    def create_recipes(self, count, user_ids, tag_ids, ingredient_ids,
+                       tags_per_recipe, ingredients_per_recipe):
+        started = perf_counter()
+        recipe_ids = []
+        links = 0
+        for batch in batched(range(count), self.batch_size):
+            recipes = Recipe.objects.bulk_create(
+                Recipe(author_id=self.random.choice(user_ids),
+                       name=f'Рецепт {self.prefix}-{number}',
+                       text='Синтетический рецепт для нагрузочного теста.',
+                       cooking_time=self.random.randint(5, 180))
+                for number in batch
+            )
+            tag_links = []
+            ingredient_links = []
+            for recipe in recipes:
+                recipe_ids.append(recipe.pk)
+                tag_links.extend(
+                    TagRecipe(recipe_id=recipe.pk, tag_id=tag_id)
+                    for tag_id in self.random.sample(
+                        tag_ids, min(tags_per_recipe, len(tag_ids))))
+                ingredient_links.extend(
+                    IngredientRecipe(recipe_id=recipe.pk,
+                                     ingredient_id=ingredient_id,
+                                     amount=self.random.randint(1, 500))
+                    for ingredient_id in self.random.sample(
+                        ingredient_ids, ingredients_per_recipe))
+            TagRecipe.objects.bulk_create(tag_links)
+            IngredientRecipe.objects.bulk_create(
+                ingredient_links, batch_size=self.batch_size)
+            links += len(tag_links) + len(ingredient_links)
+        self.report('Рецепты', len(recipe_ids), started)
+        self.report('Связи с тэгами и ингредиентами', links, started)
+        return recipe_ids
+
+    def fill_feed(self):
+        started = perf_counter()
+        backfill(Subscriptions.objects.filter(
+            user__username__startswith=f'bench-{self.prefix}-'))
+        self.report('Записи лент подписок', FeedItem.objects.filter(
+            user__username__startswith=f'bench-{self.prefix}-').count(),
+            started)
+
+    def create_relations(self, model, target, user_ids, target_ids,
+                         per_user):
+        started = perf_counter()
+        per_user = min(per_user, len(target_ids))
+        if not per_user:
+            return
+        created = 0
+        for batch in batched(user_ids, max(1, self.batch_size // per_user)):
+            objects = [
+                model(user_id=user_id, **{f'{target}_id': target_id})
+                for user_id in batch
+                for target_id in self.random.sample(target_ids, per_user)
+                if target_id != user_id or target != 'author'
+            ]
+            model.objects.bulk_create(objects, ignore_conflicts=True)
+            created += len(objects)
+        self.report(model._meta.verbose_name_plural, created, started)
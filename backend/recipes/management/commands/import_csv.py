@@ -1,9 +1,15 @@
 import csv
 import os
+from itertools import islice
+from time import perf_counter
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.cache import bump_data_version
+from recipes.constants import IMPORT_BATCH_SIZE, INGREDIENTS_VERSION
 from recipes.models import Ingredient
 
 User = get_user_model()
@@ -11,32 +17,48 @@ User = get_user_model()
 FILES = {
     'ingredients.csv': Ingredient,
 }
+FIELDS = ('name', 'measurement_unit')
+
+
+def read_rows(file):
+    """Построчно читает CSV, пропуская заголовок, если он есть."""
+    for line, row in enumerate(csv.reader(file)):
+        if line == 0 and tuple(row) == FIELDS:
+            continue
+        yield row
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
 
 
 class Command(BaseCommand):
     help = 'Импорт данных из CSV-файлов'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            help='Путь к CSV-файлу вместо файла из CSV_DATA_PATH.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Количество строк, обрабатываемых за один запрос.')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать изменения, не записывая их в базу.')
+
+    def handle(self, *args, **options):
         for csv_file, model in FILES.items():
+            file_path = options['path'] or os.path.join(
+                settings.CSV_DATA_PATH, csv_file)
             try:
-                file_path = os.path.join(settings.CSV_DATA_PATH, csv_file)
                 with open(file_path, encoding='utf-8') as file:
-                    reader = csv.DictReader(file)
-                    for row in reader:
-                        if 'name' in row and 'measurement_unit' in row:
-                            obj, created = model.objects.update_or_create(
-                                name=row['name'],
-                                measurement_unit=row['measurement_unit']
-                            )
-
-                            if created:
-                                self.stdout.write(
-                                    f'Создан новый '
-                                    f'объект {model.__name__}: {obj}')
-                            else:
-                                self.stdout.write(
-                                    f'Обновлён объект {model.__name__}: {obj}')
-
+                    self.import_file(model, file, options['batch_size'],
+                                     options['dry_run'])
             except FileNotFoundError as error:
                 raise CommandError(f'Файл не найден: {error}')
             except Exception as e:
@@ -44,3 +66,50 @@ class Command(BaseCommand):
                     f'Ошибка при импорте данных из {csv_file}: {e}')
 
         self.stdout.write('Импорт данных завершён')
+
+    def import_file(self, model, file, batch_size, dry_run):
+        """Пакетный импорт: каждая порция строк сверяется с уже
+        существующими ключами (name, measurement_unit), новые записи
+        добавляются одним bulk_create внутри общей транзакции."""
+        started = perf_counter()
+        stats = {'rows': 0, 'created': 0, 'skipped': 0, 'invalid': 0}
+        seen = set()
+        with transaction.atomic():
+            for chunk in chunks(read_rows(file), batch_size):
+                keys = []
+                for row in chunk:
+                    stats['rows'] += 1
+                    if len(row) != len(FIELDS) or not row[0]:
+                        stats['invalid'] += 1
+                        continue
+                    key = tuple(row)
+                    if key in seen:
+                        stats['skipped'] += 1
+                        continue
+                    seen.add(key)
+                    keys.append(key)
+                existing = set(model.objects.filter(
+                    name__in={name for name, _ in keys}
+                ).values_list(*FIELDS))
+                new = [key for key in keys if key not in existing]
+                stats['skipped'] += len(keys) - len(new)
+                stats['created'] += len(new)
+                if not dry_run and new:
+                    model.objects.bulk_create(
+                        [model(**dict(zip(FIELDS, key))) for key in new],
+                        batch_size=batch_size,
+                        ignore_conflicts=True,
+                    )
+        if stats['created'] and not dry_run:
+            bump_data_version(INGREDIENTS_VERSION)
+
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            f'{model.__name__}: '
+            f'{"проверка без записи, " if dry_run else ""}'
+            f'строк {stats["rows"]} '
+            f'({stats["rows"] / elapsed if elapsed else 0:.0f} строк/с), '
+            f'создано {stats["created"]}, '
+            f'пропущено {stats["skipped"]}, '
+            f'с ошибками {stats["invalid"]}'
+        )
@@ -0,0 +1,33 @@
+from time import perf_counter, sleep
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.constants import SEARCH_BATCH_SIZE
+from recipes.models import Recipe
+from recipes.search import rebuild_search_vectors, search_available
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт поискового вектора рецептов порциями, без долгой '
+            'блокировки таблицы')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=SEARCH_BATCH_SIZE,
+                            help='Количество рецептов в одном UPDATE.')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Пауза между порциями в секундах.')
+
+    def handle(self, *args, **options):
+        if not search_available():
+            raise CommandError('Полнотекстовый поиск доступен только '
+                               'в PostgreSQL.')
+        started = perf_counter()
+        updated = 0
+        for count in rebuild_search_vectors(Recipe.objects.all(),
+                                            options['batch_size']):
+            updated += count
+            self.stdout.write(f'Обновлено рецептов: {updated}')
+            sleep(options['pause'])
+        self.stdout.write(f'Поисковый индекс пересчитан за '
+                          f'{perf_counter() - started:.1f} с.')
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.counters import repair_counter
+from recipes.models import Favorite, Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт денормализованных счётчиков: рецептов в избранном '
+            'и рецептов у авторов')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать число расхождений, не исправляя их.')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        favorites = repair_counter(Recipe.objects.all(), 'favorites_count',
+                                   Favorite, 'recipe', dry_run)
+        recipes = repair_counter(User.objects.all(), 'recipes_count',
+                                 Recipe, 'author', dry_run)
+        action = 'Найдено расхождений' if dry_run else 'Исправлено'
+        self.stdout.write(f'{action}: favorites_count у рецептов — '
+                          f'{favorites}, recipes_count у пользователей — '
+                          f'{recipes}')
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.16 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    """Сливает ингредиенты с одинаковыми названием и единицей измерения.
+
+    Строки рецептов переносятся на ингредиент с наименьшим ID, остальные
+    копии удаляются.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    groups = list(Ingredient.objects.values(
+        'name', 'measurement_unit').annotate(
+        keep=Min('id'), total=Count('id')).filter(total__gt=1))
+    for group in groups:
+        extra = Ingredient.objects.filter(
+            name=group['name'],
+            measurement_unit=group['measurement_unit'],
+        ).exclude(pk=group['keep'])
+        IngredientRecipe.objects.filter(ingredient__in=extra).update(
+            ingredient_id=group['keep'])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient_name_measurement_unit'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.16 on 2026-10-18 10:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counter(queryset, counter, model, field):
+    """Записывает в ``counter`` число строк ``model``, ссылающихся на
+    запись через ``field``; записи без ссылок остаются с нулём."""
+    actual = Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count')
+        ),
+        Value(0),
+    )
+    queryset.filter(pk__in=model.objects.values(field)).update(
+        **{counter: actual})
+
+
+def fill_counters(apps, schema_editor):
+    Favorite = apps.get_model('recipes', 'Favorite')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RegularUser = apps.get_model('users', 'RegularUser')
+    fill_counter(Recipe.objects.all(), 'favorites_count', Favorite, 'recipe')
+    fill_counter(RegularUser.objects.all(), 'recipes_count', Recipe, 'author')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_created_at_id_index'),
+        ('users', '0002_regularuser_recipes_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Счётчик добавлений в избранное', verbose_name='В избранном'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
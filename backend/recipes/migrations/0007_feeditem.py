@@ -0,0 +1,56 @@
+# Generated by Django 4.2.16 on 2026-10-18 13:07
+
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 1000
+
+
+def fill_feed(apps, schema_editor):
+    """Заполняет ленты порциями, не собирая все записи в памяти."""
+    FeedItem = apps.get_model('recipes', 'FeedItem')
+    Subscriptions = apps.get_model('recipes', 'Subscriptions')
+    rows = Subscriptions.objects.filter(
+        author__recipes__isnull=False).values_list(
+        'user_id', 'author__recipes__id',
+        'author__recipes__created_at').iterator(chunk_size=BATCH_SIZE)
+    while batch := list(islice(rows, BATCH_SIZE)):
+        FeedItem.objects.bulk_create(
+            [FeedItem(user_id=user_id, recipe_id=recipe_id,
+                      created_at=created_at)
+             for user_id, recipe_id, created_at in batch])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0006_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(verbose_name='Опубликован')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['user', '-created_at', '-id'], name='feed_user_created_at_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feeditem',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_user_recipe'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
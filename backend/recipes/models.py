@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 
@@ -48,6 +49,12 @@ class Ingredient(models.Model):
     )
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient_name_measurement_unit'
+            )
+        ]
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
 
@@ -93,18 +100,31 @@ class Recipe(BaseModel):
         help_text='Время приготовления в минутах',
         validators=[MinValueValidator(MIN_TIME_COOKING)]
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном',
+        help_text='Счётчик добавлений в избранное'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор',
+        help_text='Заполняется триггером из названия и описания'
+    )
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'],
+                         name='recipe_created_at_id_idx')
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
     def __str__(self):
         return self.name
 
-    def favorite_count(self):
-        return Favorite.objects.filter(recipe=self).count()
-
 
 class TagRecipe(models.Model):
     tag = models.ForeignKey(
@@ -231,3 +251,42 @@ class Subscriptions(models.Model):
 
     def __str__(self):
         return f'{self.user} - {self.author}'
+
+
+class FeedItem(models.Model):
+    """Рецепт в ленте подписчика.
+
+    Строки добавляются при публикации рецепта и при подписке на автора,
+    поэтому лента читается по индексу без перебора подписок.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Рецепт'
+    )
+    created_at = models.DateTimeField(verbose_name='Опубликован')
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_user_recipe'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'],
+                         name='feed_user_created_at_idx')
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+
+    def __str__(self):
+        return f'{self.user} - {self.recipe}'
@@ -1,4 +1,5 @@
-from rest_framework.pagination import (LimitOffsetPagination,
+from rest_framework.pagination import (CursorPagination,
+                                       LimitOffsetPagination,
                                        PageNumberPagination)
 
 
@@ -10,6 +11,18 @@ class RecipePagination(PageNumberPagination):
     page_size = 6
 
 
+class RecipeCursorPagination(CursorPagination):
+    """Постраничный вывод по ключу (created_at, id) без COUNT и OFFSET."""
+    page_size = 6
+    ordering = ('-created_at', '-id')
+
+
 class SubscribePagination(LimitOffsetPagination):
     default_limit = 10
     max_limit = 10
+
+
+class FeedCursorPagination(CursorPagination):
+    """Лента подписок по ключу (created_at, id) записи ленты."""
+    page_size = 6
+    ordering = ('-created_at', '-id')
@@ -0,0 +1,110 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+from core.cache import LocalCopy
+from .constants import RECIPE_INGREDIENTS_VERSION
+from .models import IngredientRecipe
+
+
+def find(posting, recipe_id):
+    """Позиция ``recipe_id`` в отсортированном массиве или None."""
+    index = bisect_left(posting, recipe_id)
+    if index < len(posting) and posting[index] == recipe_id:
+        return index
+    return None
+
+
+class RecipeIngredientIndex(LocalCopy):
+    """Обратный индекс «ингредиент → рецепты» в памяти процесса.
+
+    Для каждого ингредиента хранится отсортированный массив ID рецептов,
+    для каждого рецепта — число его ингредиентов. Индекс строится одним
+    запросом к IngredientRecipe, а при создании, изменении и удалении
+    рецептов перечитываются только их строки (см. publish_changes).
+    """
+
+    namespace = RECIPE_INGREDIENTS_VERSION
+
+    def __init__(self):
+        super().__init__()
+        self._postings = {}
+        self._sizes = {}
+
+    def build(self):
+        postings = {}
+        sizes = Counter()
+        rows = IngredientRecipe.objects.order_by(
+            'ingredient_id', 'recipe_id').values_list(
+            'ingredient_id', 'recipe_id').iterator()
+        for ingredient_id, recipe_id in rows:
+            if ingredient_id not in postings:
+                postings[ingredient_id] = array('Q')
+            postings[ingredient_id].append(recipe_id)
+            sizes[recipe_id] += 1
+        self._postings = postings
+        self._sizes = dict(sizes)
+
+    def apply(self, changed):
+        """Заменяет строки изменённых рецептов.
+
+        Затронутые массивы копируются и подменяются целиком, чтобы
+        параллельный поиск не видел их наполовину изменёнными.
+        """
+        added = defaultdict(list)
+        sizes = Counter()
+        rows = IngredientRecipe.objects.filter(
+            recipe_id__in=changed).values_list('ingredient_id', 'recipe_id')
+        for ingredient_id, recipe_id in rows:
+            added[ingredient_id].append(recipe_id)
+            sizes[recipe_id] += 1
+        postings = dict(self._postings)
+        copied = set()
+
+        def writable(ingredient_id):
+            if ingredient_id not in copied:
+                copied.add(ingredient_id)
+                postings[ingredient_id] = array(
+                    'Q', postings.get(ingredient_id, ()))
+            return postings[ingredient_id]
+
+        for ingredient_id, posting in self._postings.items():
+            indexes = (find(posting, recipe_id) for recipe_id in changed)
+            for index in sorted((index for index in indexes
+                                 if index is not None), reverse=True):
+                del writable(ingredient_id)[index]
+        for ingredient_id, recipe_ids in added.items():
+            posting = writable(ingredient_id)
+            for recipe_id in recipe_ids:
+                insort(posting, recipe_id)
+        self._sizes.update(sizes)
+        self._postings = {ingredient_id: posting
+                          for ingredient_id, posting in postings.items()
+                          if posting}
+        for recipe_id in changed - sizes.keys():
+            self._sizes.pop(recipe_id, None)
+
+    def match(self, ingredient_ids):
+        """Рецепты, в которых есть хотя бы один из ``ingredient_ids``.
+
+        Возвращает список (recipe_id, совпало, не хватает): сначала рецепты
+        с наибольшей долей имеющихся ингредиентов, затем с наименьшим
+        числом недостающих, затем более новые.
+        """
+        self.refresh()
+        postings, sizes = self._postings, self._sizes
+        matched = Counter()
+        for ingredient_id in set(ingredient_ids):
+            matched.update(postings.get(ingredient_id, ()))
+        ranked = []
+        for recipe_id, count in matched.items():
+            size = sizes.get(recipe_id)
+            # Рецепт мог измениться, пока шёл поиск.
+            if size is not None:
+                ranked.append((recipe_id, count, max(size - count, 0)))
+        ranked.sort(key=lambda item: (-item[1] / (item[1] + item[2]),
+                                      item[2], -item[0]))
+        return ranked
+
+
+recipe_index = RecipeIngredientIndex()
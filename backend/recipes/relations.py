@@ -0,0 +1,44 @@
+from functools import cached_property
+
+from .models import Favorite, ShoppingCart, Subscriptions
+
+
+class UserRelations:
+    """Подписки, избранное и корзина текущего пользователя.
+
+    Каждое множество загружается одним запросом при первом обращении
+    и дальше используется всеми сериализаторами того же запроса.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def _ids(self, model, field):
+        if not getattr(self.user, 'is_authenticated', False):
+            return frozenset()
+        return frozenset(model.objects.filter(user=self.user).values_list(
+            field, flat=True))
+
+    @cached_property
+    def following(self):
+        return self._ids(Subscriptions, 'author_id')
+
+    @cached_property
+    def favorites(self):
+        return self._ids(Favorite, 'recipe_id')
+
+    @cached_property
+    def cart(self):
+        return self._ids(ShoppingCart, 'recipe_id')
+
+
+def get_relations(request):
+    """Связи пользователя, привязанные к текущему HTTP-запросу."""
+    if request is None:
+        return UserRelations(None)
+    http_request = getattr(request, '_request', request)
+    relations = getattr(http_request, 'user_relations', None)
+    if relations is None or relations.user != request.user:
+        relations = UserRelations(request.user)
+        http_request.user_relations = relations
+    return relations
@@ -0,0 +1,49 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import F, Q
+
+from .constants import SEARCH_CONFIG
+
+# Тот же вектор строит триггер в миграции 0006: название весомее описания.
+RECIPE_SEARCH_VECTOR = (
+    SearchVector('name', weight='A', config=SEARCH_CONFIG)
+    + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+)
+
+
+def search_available():
+    return connection.vendor == 'postgresql'
+
+
+def search_recipes(queryset, value):
+    """Рецепты, подходящие под запрос, от наиболее релевантных.
+
+    В PostgreSQL используется поиск по индексу search_vector с русской
+    морфологией, в остальных СУБД — поиск подстроки.
+    """
+    if not search_available():
+        return queryset.filter(
+            Q(name__icontains=value) | Q(text__icontains=value))
+    query = SearchQuery(value, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    ).order_by('-search_rank', '-created_at', '-id')
+
+
+def rebuild_search_vectors(queryset, batch_size):
+    """Пересчитывает search_vector порциями по первичному ключу.
+
+    Каждая порция обновляется отдельным коротким UPDATE, поэтому строки
+    блокируются ненадолго и таблица остаётся доступной для записи.
+    Возвращает генератор с числом обновлённых строк в каждой порции.
+    """
+    last_pk = 0
+    while True:
+        pks = list(queryset.filter(pk__gt=last_pk).order_by('pk')
+                   .values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        last_pk = pks[-1]
+        yield queryset.filter(pk__in=pks).update(
+            search_vector=RECIPE_SEARCH_VECTOR)
@@ -1,12 +1,21 @@
+from functools import partial
+
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.shortcuts import get_object_or_404
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from .constants import RECIPE_INGREDIENTS_VERSION, RECIPES_VERSION
+from .feed import fan_out
 from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                     ShoppingCart, Subscriptions, Tag)
-from core.serializers import Base64ImageField
+                     ShoppingCart, Subscriptions, Tag, TagRecipe)
+from .relations import get_relations
+from .shortlinks import short_link
+from core.cache import bump_data_version, publish_changes
+from core.images import build_image_url
+from core.serializers import (Base64ImageField, TimedDataMixin,
+                              TimedListSerializer)
 
 User = get_user_model()
 
@@ -20,13 +29,13 @@ class RecipeShortSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'image', 'cooking_time')
 
     def get_image(self, obj):
-        request = self.context.get('request')
-        image_url = obj.image.url if obj.image else None
-        return request.build_absolute_uri(image_url) if image_url else None
+        return build_image_url(self.context.get('request'), obj.image,
+                               'thumb')
 
 
 class AuthorSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    avatar = Base64ImageField(variant='thumb', read_only=True)
 
     class Meta:
         model = User
@@ -34,25 +43,23 @@ class AuthorSerializer(serializers.ModelSerializer):
                   'last_name', 'is_subscribed', 'avatar')
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request and not request.user.is_anonymous:
-            return Subscriptions.objects.filter(
-                user=request.user,
-                author=obj).exists()
-        return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in get_relations(self.context.get('request')).following
 
 
-class SubscribeSerializer(serializers.ModelSerializer):
+class SubscribeSerializer(TimedDataMixin, serializers.ModelSerializer):
     author = AuthorSerializer(read_only=True)
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.IntegerField(
-        source='author.recipes.count',
+        source='author.recipes_count',
         read_only=True
     )
 
     class Meta:
         model = Subscriptions
         fields = ('author', 'recipes', 'recipes_count')
+        list_serializer_class = TimedListSerializer
 
     def to_representation(self, instance):
         """Отображаем пользователя с полным URL изображения и его рецепты."""
@@ -60,17 +67,19 @@ class SubscribeSerializer(serializers.ModelSerializer):
         user_data = AuthorSerializer(instance.author,
                                      context=self.context).data
         user = instance.author
-        limit = request.query_params.get('recipes_limit', None)
-        recipes = user.recipes.all()
-        if limit is not None:
-            recipes = recipes[:int(limit)]
+        recipes = getattr(user, 'limited_recipes', None)
+        if recipes is None:
+            limit = request.query_params.get('recipes_limit', None)
+            recipes = user.recipes.all()
+            if limit is not None:
+                recipes = recipes[:int(limit)]
         return {
             **user_data,
             'recipes': RecipeShortSerializer(
                 recipes,
                 many=True,
                 context=self.context).data,
-            'recipes_count': user.recipes.count(),
+            'recipes_count': user.recipes_count,
         }
 
     def get_recipes(self, obj):
@@ -86,7 +95,7 @@ class SubscribeSerializer(serializers.ModelSerializer):
             context=self.context).data
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
+class ShoppingCartSerializer(TimedDataMixin, serializers.ModelSerializer):
     user = serializers.HiddenField(
         default=serializers.CurrentUserDefault())
     recipe = serializers.PrimaryKeyRelatedField(
@@ -108,7 +117,7 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
                                      context=self.context).data
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(TimedDataMixin, serializers.ModelSerializer):
     user = serializers.HiddenField(
         default=serializers.CurrentUserDefault())
     recipe = serializers.PrimaryKeyRelatedField(
@@ -130,16 +139,18 @@ class FavoriteSerializer(serializers.ModelSerializer):
                                      context=self.context).data
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedDataMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ('id', 'name', 'slug')
+        list_serializer_class = TimedListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedDataMixin, serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
 
 
 class IngredientRecipeGetSerializer(serializers.ModelSerializer):
@@ -156,7 +167,7 @@ class IngredientRecipeGetSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeGetSerializer(serializers.ModelSerializer):
+class RecipeGetSerializer(TimedDataMixin, serializers.ModelSerializer):
     author = AuthorSerializer()
     ingredients = IngredientRecipeGetSerializer(many=True,
                                                 source='recipe_with_ingredient'
@@ -165,24 +176,27 @@ class RecipeGetSerializer(serializers.ModelSerializer):
     image = Base64ImageField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    short_link = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
                   'is_in_shopping_cart', 'name', 'image', 'text',
-                  'cooking_time')
+                  'cooking_time', 'short_link')
+        list_serializer_class = TimedListSerializer
+
+    def get_short_link(self, obj):
+        return short_link(obj.id)
 
     def get_is_favorited(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return Favorite.objects.filter(user=user, recipe=obj).exists()
-        return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return obj.id in get_relations(self.context.get('request')).favorites
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return ShoppingCart.objects.filter(user=user, recipe=obj).exists()
-        return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return obj.id in get_relations(self.context.get('request')).cart
 
 
 class IngredientRecipePostSerializer(serializers.ModelSerializer):
@@ -194,7 +208,15 @@ class IngredientRecipePostSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class RecipePostSerializer(serializers.ModelSerializer):
+class RecipeMatchSerializer(RecipeGetSerializer):
+    matched = serializers.IntegerField(read_only=True)
+    missing = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipeGetSerializer.Meta):
+        fields = RecipeGetSerializer.Meta.fields + ('matched', 'missing')
+
+
+class RecipePostSerializer(TimedDataMixin, serializers.ModelSerializer):
     ingredients = IngredientRecipePostSerializer(many=True, required=True)
     tags = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all(),
                                               many=True,
@@ -231,17 +253,19 @@ class RecipePostSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 {'tags': 'Теги не должны повторяться.'})
         for ingredient_data in ingredients_data:
-            ingredient_id = ingredient_data.get('id')
-            amount = ingredient_data.get('amount')
-            if not Ingredient.objects.filter(id=ingredient_id).exists():
+            if ingredient_data['amount'] <= 0:
                 raise serializers.ValidationError(
-                    {'ingredients': f'Ингредиент с ID {ingredient_id} не '
-                                    f'существует.'})
-            if amount <= 0:
-                raise serializers.ValidationError(
-                    {'ingredients': f'Количество для '
-                                    f'ингредиента с ID {ingredient_id} '
+                    {'ingredients': f'Количество для ингредиента с ID '
+                                    f'{ingredient_data["id"]} '
                                     f'должно быть больше 0!!!'})
+        existing = set(Ingredient.objects.filter(
+            id__in=ingredient_ids).values_list('id', flat=True))
+        missing = [str(ingredient_id) for ingredient_id in ingredient_ids
+                   if ingredient_id not in existing]
+        if missing:
+            raise serializers.ValidationError(
+                {'ingredients': f'Ингредиенты с ID {", ".join(missing)} не '
+                                f'существуют.'})
         return attrs
 
     @transaction.atomic
@@ -251,35 +275,105 @@ class RecipePostSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags_data)
         self.create_ingredients(recipe, ingredients_data)
+        fan_out(recipe)
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients_data = validated_data.get('ingredients')
-        tags_data = validated_data.get('tags')
+        """Изменяет только то, что отличается от текущего состояния."""
+        ingredients_data = validated_data.pop('ingredients', None)
+        tags_data = validated_data.pop('tags', None)
         if tags_data:
-            instance.tags.set(tags_data)
-
+            self.update_tags(instance, tags_data)
         if ingredients_data:
-            instance.recipe_with_ingredient.all().delete()
-            self.create_ingredients(instance, ingredients_data)
-
-        if 'image' in validated_data:
-            instance.image = validated_data.get('image', instance.image)
-        instance.save()
+            self.update_ingredients(instance, ingredients_data)
+
+        changed = [field for field, value in validated_data.items()
+                   if getattr(instance, field) != value]
+        for field in changed:
+            setattr(instance, field, validated_data[field])
+        if changed:
+            instance.save(update_fields=changed)
         return instance
 
     def create_ingredients(self, recipe, ingredients_data):
         ingredient_objects = [
             IngredientRecipe(
                 recipe=recipe,
-                ingredient=get_object_or_404(Ingredient,
-                                             id=ingredient_data['id']),
+                ingredient_id=ingredient_data['id'],
                 amount=ingredient_data['amount']
             )
             for ingredient_data in ingredients_data
         ]
         IngredientRecipe.objects.bulk_create(ingredient_objects)
+        self.ingredients_changed(recipe)
+
+    def update_ingredients(self, recipe, ingredients_data):
+        """Добавляет, изменяет и удаляет только отличающиеся строки."""
+        current = {row.ingredient_id: row
+                   for row in IngredientRecipe.objects.filter(recipe=recipe)}
+        amounts = {ingredient_data['id']: ingredient_data['amount']
+                   for ingredient_data in ingredients_data}
+        created = [
+            IngredientRecipe(recipe=recipe, ingredient_id=ingredient_id,
+                             amount=amount)
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        ]
+        updated = []
+        for ingredient_id, row in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and amount != row.amount:
+                row.amount = amount
+                updated.append(row)
+        removed = [row.pk for ingredient_id, row in current.items()
+                   if ingredient_id not in amounts]
+        if created:
+            IngredientRecipe.objects.bulk_create(created)
+        if updated:
+            IngredientRecipe.objects.bulk_update(updated, ['amount'])
+        if removed:
+            IngredientRecipe.objects.filter(pk__in=removed).delete()
+        if created or updated or removed:
+            self.ingredients_changed(recipe)
+
+    def update_tags(self, recipe, tags):
+        current = set(TagRecipe.objects.filter(recipe=recipe).values_list(
+            'tag_id', flat=True))
+        new = {tag.pk for tag in tags}
+        if current - new:
+            TagRecipe.objects.filter(recipe=recipe,
+                                     tag_id__in=current - new).delete()
+        if new - current:
+            TagRecipe.objects.bulk_create(
+                TagRecipe(recipe=recipe, tag_id=tag_id)
+                for tag_id in new - current)
+        if current != new:
+            transaction.on_commit(
+                partial(bump_data_version, RECIPES_VERSION))
+
+    def ingredients_changed(self, recipe):
+        """Массовые операции не вызывают сигналов, версии меняются здесь."""
+        transaction.on_commit(partial(
+            publish_changes, RECIPE_INGREDIENTS_VERSION, [recipe.pk]))
+        transaction.on_commit(partial(bump_data_version, RECIPES_VERSION))
 
     def to_representation(self, instance):
+        instance._prefetched_objects_cache = {}
+        prefetch_related_objects(
+            [instance], 'tags',
+            Prefetch('recipe_with_ingredient',
+                     queryset=IngredientRecipe.objects.select_related(
+                         'ingredient')))
         return RecipeGetSerializer(instance, context=self.context).data
+
+
+class FeedItemSerializer(TimedDataMixin, serializers.BaseSerializer):
+    """Запись ленты выводится как рецепт."""
+
+    class Meta:
+        list_serializer_class = TimedListSerializer
+
+    def to_representation(self, instance):
+        return RecipeGetSerializer(instance.recipe,
+                                   context=self.context).data
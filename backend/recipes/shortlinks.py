@@ -0,0 +1,71 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from hashids import Hashids
+
+from core.cache import LocalCopy
+from utils import SHORT_LINK
+from .constants import (RECIPE_IDS_VERSION, SHORT_CODE_CACHE_SIZE,
+                        SHORT_CODE_MIN_LENGTH)
+from .models import Recipe
+
+
+@lru_cache(maxsize=None)
+def get_hashids():
+    """Кодировщик строится при первой короткой ссылке, а не при импорте:
+    без SALT не работают только короткие ссылки."""
+    if not settings.SALT:
+        raise ImproperlyConfigured(
+            'Для коротких ссылок нужна переменная окружения SALT.')
+    return Hashids(min_length=SHORT_CODE_MIN_LENGTH, salt=settings.SALT)
+
+
+@lru_cache(maxsize=SHORT_CODE_CACHE_SIZE)
+def encode(recipe_id):
+    """Короткий код рецепта; результат кэшируется в памяти процесса."""
+    return get_hashids().encode(recipe_id)
+
+
+def decode(short_id):
+    """ID рецепта по короткому коду или None для чужих кодов."""
+    decoded = get_hashids().decode(short_id)
+    if len(decoded) != 1 or encode(decoded[0]) != short_id:
+        return None
+    return decoded[0]
+
+
+def short_link(recipe_id):
+    return SHORT_LINK + encode(recipe_id)
+
+
+class RecipeIds(LocalCopy):
+    """Множество ID существующих рецептов в памяти процесса.
+
+    Сигналы публикуют ID созданных и удалённых рецептов
+    (см. publish_changes), и множество обновляется только по ним;
+    целиком оно перечитывается при первом обращении и когда журнал
+    изменений неполон.
+    """
+
+    namespace = RECIPE_IDS_VERSION
+
+    def __init__(self):
+        super().__init__()
+        self._ids = set()
+
+    def build(self):
+        self._ids = set(Recipe.objects.values_list('pk', flat=True))
+
+    def apply(self, changed):
+        existing = Recipe.objects.filter(pk__in=changed).values_list(
+            'pk', flat=True)
+        self._ids.difference_update(changed)
+        self._ids.update(existing)
+
+    def __contains__(self, recipe_id):
+        self.refresh()
+        return recipe_id in self._ids
+
+
+recipe_ids = RecipeIds()
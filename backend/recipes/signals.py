@@ -0,0 +1,115 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import bump_data_version, publish_changes
+from core.images import image_processed, schedule_image_processing
+from .constants import (INGREDIENTS_VERSION, RECIPE_IDS_VERSION,
+                        RECIPE_IMAGE_VARIANTS, RECIPE_INGREDIENTS_VERSION,
+                        RECIPES_VERSION, TAGS_VERSION)
+from .feed import backfill, trim
+from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                     Subscriptions, Tag, TagRecipe)
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(**kwargs):
+    """Индекс поиска ингредиентов устарел; версии меняются после
+    фиксации транзакции, см. recipes_changed."""
+    transaction.on_commit(partial(bump_data_version, INGREDIENTS_VERSION))
+    transaction.on_commit(partial(bump_data_version, RECIPES_VERSION))
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(**kwargs):
+    transaction.on_commit(partial(bump_data_version, TAGS_VERSION))
+    transaction.on_commit(partial(bump_data_version, RECIPES_VERSION))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver(post_save, sender=TagRecipe)
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(m2m_changed, sender=TagRecipe)
+@receiver(image_processed, sender=Recipe)
+@receiver(image_processed, sender=User)
+def recipes_changed(**kwargs):
+    """Ответы со списками рецептов устарели.
+
+    post_delete для связей не подключается: он отключил бы быстрое
+    каскадное удаление рецепта, а удаление рецепта и так меняет версию.
+    Массовые вставки и удаления IngredientRecipe сигналов не вызывают,
+    поэтому сериализатор рецепта меняет версию сам.
+
+    Версия меняется после фиксации транзакции: иначе параллельный запрос
+    успел бы закэшировать старые данные уже под новой версией.
+    """
+    transaction.on_commit(partial(bump_data_version, RECIPES_VERSION))
+
+
+@receiver((post_save, post_delete), sender=User)
+def author_changed(update_fields=None, **kwargs):
+    """Данные автора входят в ответы с рецептами; вход пользователя
+    (обновление одного last_login) на них не влияет."""
+    if update_fields != frozenset(('last_login',)):
+        transaction.on_commit(partial(bump_data_version, RECIPES_VERSION))
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_added(instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            favorites_count=F('favorites_count') + 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_removed(instance, **kwargs):
+    Recipe.objects.filter(pk=instance.recipe_id,
+                          favorites_count__gt=0).update(
+        favorites_count=F('favorites_count') - 1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_added(instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(publish_changes, RECIPE_IDS_VERSION,
+                                      [instance.pk]))
+        User.objects.filter(pk=instance.author_id).update(
+            recipes_count=F('recipes_count') + 1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_image_saved(instance, **kwargs):
+    schedule_image_processing(instance, 'image', RECIPE_IMAGE_VARIANTS)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_removed(instance, **kwargs):
+    for namespace in (RECIPE_IDS_VERSION, RECIPE_INGREDIENTS_VERSION):
+        transaction.on_commit(partial(publish_changes, namespace,
+                                      [instance.pk]))
+    User.objects.filter(pk=instance.author_id, recipes_count__gt=0).update(
+        recipes_count=F('recipes_count') - 1)
+
+
+@receiver(post_save, sender=IngredientRecipe)
+def recipe_ingredient_saved(instance, **kwargs):
+    """Строки, сохранённые по одной (например, в админке)."""
+    transaction.on_commit(partial(publish_changes, RECIPE_INGREDIENTS_VERSION,
+                                  [instance.recipe_id]))
+
+
+@receiver(post_save, sender=Subscriptions)
+def subscription_added(instance, created, **kwargs):
+    if created:
+        backfill(Subscriptions.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Subscriptions)
+def subscription_removed(instance, **kwargs):
+    trim(instance.user_id, instance.author_id)
@@ -1,35 +1,100 @@
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404, redirect
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
+from django.http import HttpResponsePermanentRedirect, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.views import View
 from django_filters.rest_framework import DjangoFilterBackend
-from django.conf import settings
-from hashids import Hashids
-from rest_framework import filters, generics, status, viewsets
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import (AllowAny, IsAuthenticated,
+                                        IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from recipes.filters import IngredientFilter, RecipeFilter
-from recipes.pagination import RecipePagination, SubscribePagination
-from .models import (Favorite, Ingredient, Recipe, ShoppingCart, Subscriptions,
-                     Tag)
-from utils import SHORT_LINK
-from .serializers import (FavoriteSerializer, IngredientSerializer,
-                          RecipeGetSerializer, RecipePostSerializer,
+from recipes.filters import RecipeFilter
+from recipes.ingredient_index import ingredient_index
+from recipes.recipe_index import recipe_index
+from recipes.pagination import (FeedCursorPagination, RecipeCursorPagination,
+                                RecipePagination, SubscribePagination)
+from recipes.shortlinks import decode, recipe_ids, short_link
+from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                     ShoppingCart, Subscriptions, Tag)
+from core.mixins import AnonymousCacheMixin, VersionedCacheMixin
+from .constants import (INGREDIENTS_VERSION, MAX_MATCH_INGREDIENTS,
+                        RECIPES_VERSION, SHORT_LINK_MAX_AGE, TAGS_VERSION)
+from .serializers import (FavoriteSerializer, FeedItemSerializer,
+                          IngredientSerializer,
+                          RecipeGetSerializer, RecipeMatchSerializer,
+                          RecipePostSerializer,
                           ShoppingCartSerializer, SubscribeSerializer,
                           TagSerializer)
 
 User = get_user_model()
 
 
-class RecipeRedirectView(APIView):
-    hashids = Hashids(min_length=4, salt=settings.SALT)
+def recipes_for(user):
+    """Рецепты с флагами текущего пользователя и связанными данными."""
+    authors = User.objects.all()
+    queryset = Recipe.objects.defer('search_vector').prefetch_related(
+        'tags',
+        Prefetch(
+            'recipe_with_ingredient',
+            queryset=IngredientRecipe.objects.select_related(
+                'ingredient')
+        ),
+    )
+    if user.is_authenticated:
+        authors = authors.annotate(is_subscribed=Exists(
+            Subscriptions.objects.filter(user=user,
+                                         author=OuterRef('pk'))))
+        queryset = queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+        )
+    else:
+        authors = authors.annotate(
+            is_subscribed=Value(False, output_field=BooleanField()))
+        queryset = queryset.annotate(
+            is_favorited=Value(False, output_field=BooleanField()),
+            is_in_shopping_cart=Value(False, output_field=BooleanField()),
+        )
+    return queryset.prefetch_related(Prefetch('author',
+                                              queryset=authors))
+
+
+def short_link_redirect(short_id):
+    recipe_id = decode(short_id)
+    if recipe_id is None:
+        return JsonResponse({'detail': 'Invalid short link.'},
+                            status=status.HTTP_404_NOT_FOUND)
+    response = HttpResponsePermanentRedirect(f'/recipes/{recipe_id}/')
+    patch_cache_control(response, public=True, max_age=SHORT_LINK_MAX_AGE)
+    return response
+
+
+def recipe_paginator(query_params):
+    """Курсорная пагинация, если клиент не передал номер страницы.
+
+    Результаты поиска упорядочены по релевантности, поэтому для них
+    используется постраничный вывод по номеру.
+    """
+    if 'page' in query_params or 'search' in query_params:
+        return RecipePagination()
+    return RecipeCursorPagination()
+
+
+class RecipeRedirectView(View):
+    """Переход по короткой ссылке без обращения к базе данных.
+
+    Код однозначно соответствует ID рецепта, поэтому ответ — постоянный
+    редирект, который могут кэшировать nginx и браузеры.
+    """
 
     def get(self, request, short_id):
-        decoded_id = self.hashids.decode(short_id)
-        if not decoded_id:
-            return Response({'detail': 'Invalid short link.'}, status=404)
-        recipe_id = decoded_id[0]
-        return redirect(f'/recipes/{recipe_id}/')
+        return short_link_redirect(short_id)
 
 
 class BaseRecipeViewSet(viewsets.ModelViewSet):
@@ -74,6 +139,7 @@ class BaseRecipeViewSet(viewsets.ModelViewSet):
 
 class BaseSubscriptionViewSet(viewsets.ModelViewSet):
     """Базовый класс для работы с подписками."""
+    permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         return Subscriptions.objects.filter(user=self.request.user)
@@ -102,32 +168,38 @@ class BaseSubscriptionViewSet(viewsets.ModelViewSet):
         return self.create_subscription(request.user, author)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(VersionedCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    cache_namespace = TAGS_VERSION
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Ingredient.objects.all()
+class IngredientViewSet(VersionedCacheMixin,
+                        viewsets.ReadOnlyModelViewSet):
     serializer_class = IngredientSerializer
     pagination_class = None
-    filter_backends = (filters.SearchFilter, DjangoFilterBackend)
-    filterset_class = IngredientFilter
-    search_fields = ('^name',)
+    cache_namespace = INGREDIENTS_VERSION
 
+    def get_queryset(self):
+        """Список ищется по началу названия через индекс в памяти."""
+        if self.action == 'list':
+            return ingredient_index.search(
+                self.request.query_params.get('name')
+                or self.request.query_params.get('search'))
+        return Ingredient.objects.all()
 
-class RecipeShortLinkView(generics.GenericAPIView):
-    hashids = Hashids(min_length=4, salt=settings.SALT)
 
-    def get(self, request, id):
-        recipe = get_object_or_404(Recipe, id=id)
-        short_id = self.hashids.encode(recipe.id)
-        short_link = SHORT_LINK + short_id
-        return Response({'short-link': short_link})
+class RecipeShortLinkView(APIView):
+    """Короткая ссылка на рецепт без запроса к базе данных."""
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
 
-    def generate_short_link(self, recipe_id):
-        return self.hashids.encode(recipe_id)
+    def get(self, request, id):
+        if id not in recipe_ids:
+            return Response({'detail': 'Рецепт не найден.'},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response({'short-link': short_link(id)})
 
 
 class ShoppingCartViewSet(BaseRecipeViewSet):
@@ -144,6 +216,24 @@ class SubscriptionsViewSet(BaseSubscriptionViewSet):
     serializer_class = SubscribeSerializer
     pagination_class = SubscribePagination
 
+    def get_queryset(self):
+        """Подписки с авторами и первыми рецептами авторов.
+
+        Рецепты ограничиваются параметром ``recipes_limit`` внутри
+        prefetch-запроса (ROW_NUMBER() OVER (PARTITION BY author_id)),
+        поэтому страница подписок выполняется за постоянное число запросов.
+        """
+        limit = self.request.query_params.get('recipes_limit')
+        limit = int(limit) if limit and limit.isdigit() else None
+        authors = User.objects.annotate(
+            is_subscribed=Value(True, output_field=BooleanField()))
+        return super().get_queryset().order_by('-id').prefetch_related(
+            Prefetch('author', queryset=authors),
+            Prefetch('author__recipes',
+                     queryset=Recipe.objects.all()[:limit],
+                     to_attr='limited_recipes'),
+        )
+
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
         page = self.paginate_queryset(queryset)
@@ -173,17 +263,33 @@ class SubscribeViewSet(BaseSubscriptionViewSet):
                         status=status.HTTP_204_NO_CONTENT)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AnonymousCacheMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_namespace = RECIPES_VERSION
     queryset = Recipe.objects.all()
     pagination_class = RecipePagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
 
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = recipe_paginator(self.request.query_params)
+        return self._paginator
+
+    def get_queryset(self):
+        return recipes_for(self.request.user)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'list':
+            context['image_variants'] = {'image': 'card'}
+        return context
+
     def partial_update(self, request, *args, **kwargs):
         recipe_id = self.kwargs['pk']
         recipe = get_object_or_404(Recipe, id=recipe_id)
-        if recipe.author != request.user:
+        if recipe.author_id != request.user.id:
             return Response(
                 {'detail': 'У вас нет прав на обновление этого рецепта.'},
                 status=status.HTTP_403_FORBIDDEN)
@@ -195,10 +301,46 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def get_serializer_class(self):
+        if self.action == 'by_ingredients':
+            return RecipeMatchSerializer
         if self.request.method == 'GET':
             return RecipeGetSerializer
         return RecipePostSerializer
 
+    @action(detail=False, url_path='by_ingredients')
+    def by_ingredients(self, request):
+        """Рецепты из имеющихся ингредиентов по обратному индексу.
+
+        Сортировка — по доле имеющихся ингредиентов и числу недостающих.
+        Из базы загружаются только рецепты текущей страницы.
+        """
+        values = ','.join(request.query_params.getlist('ingredients'))
+        ingredient_ids = [int(value) for value in values.split(',')
+                          if value.strip().isdigit()]
+        if not ingredient_ids:
+            return Response(
+                {'ingredients': 'Укажите ID ингредиентов через запятую.'},
+                status=status.HTTP_400_BAD_REQUEST)
+        if len(ingredient_ids) > MAX_MATCH_INGREDIENTS:
+            return Response(
+                {'ingredients': f'Не больше {MAX_MATCH_INGREDIENTS} '
+                                f'ингредиентов.'},
+                status=status.HTTP_400_BAD_REQUEST)
+        paginator = RecipePagination()
+        page = paginator.paginate_queryset(
+            recipe_index.match(ingredient_ids), request, view=self)
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _, _ in page])
+        results = []
+        for recipe_id, matched, missing in page:
+            recipe = recipes.get(recipe_id)
+            if recipe is not None:
+                recipe.matched = matched
+                recipe.missing = missing
+                results.append(recipe)
+        serializer = self.get_serializer(results, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
@@ -206,9 +348,25 @@ class RecipeViewSet(viewsets.ModelViewSet):
         recipe_id = self.kwargs['pk']
         recipe = get_object_or_404(Recipe, id=recipe_id)
 
-        if recipe.author != request.user:
+        if recipe.author_id != request.user.id:
             return Response(
                 {'detail': 'У вас нет прав на удаление этого рецепта.'},
                 status=status.HTTP_403_FORBIDDEN)
         recipe.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class FeedViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Лента рецептов авторов, на которых подписан пользователь."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = FeedItemSerializer
+    pagination_class = FeedCursorPagination
+
+    def get_queryset(self):
+        return self.request.user.feed.prefetch_related(
+            Prefetch('recipe', queryset=recipes_for(self.request.user)))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['image_variants'] = {'image': 'card'}
+        return context
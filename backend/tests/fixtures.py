@@ -0,0 +1,92 @@
+"""Общие данные и базовый класс тестов API."""
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Subscriptions, Tag)
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+PIXEL = ('data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAf'
+         'FcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg==')
+
+
+def seed(size):
+    """Создаёт связанные данные: авторов, рецепты, избранное, корзину."""
+    users = User.objects.bulk_create(
+        User(username=f'user{i}', email=f'user{i}@example.com',
+             first_name='Имя', last_name='Фамилия')
+        for i in range(size)
+    )
+    tags = Tag.objects.bulk_create(
+        Tag(name=slug, slug=slug) for slug in ('breakfast', 'dinner', 'lunch')
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f'ингредиент {i}', measurement_unit='г')
+        for i in range(size * 2)
+    )
+    recipes = [
+        Recipe.objects.create(author=users[i % size], name=f'Рецепт {i}',
+                              text='Описание', cooking_time=10)
+        for i in range(size * 3)
+    ]
+    for index, recipe in enumerate(recipes):
+        recipe.tags.set(tags[:1 + index % len(tags)])
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=recipe, ingredient=ingredient, amount=5)
+            for ingredient in ingredients[index % size:index % size + 4]
+        )
+    reader = users[0]
+    for recipe in recipes[::2]:
+        Favorite.objects.create(user=reader, recipe=recipe)
+        ShoppingCart.objects.create(user=reader, recipe=recipe)
+    for author in users[1:]:
+        Subscriptions.objects.create(user=reader, author=author)
+    return reader, users[1], recipes[0], tags[0], ingredients[0]
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SeededAPITestCase(APITestCase):
+    """Данные из seed, анонимный клиент и клиент с токеном читателя."""
+    size = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        (cls.user, cls.author, cls.recipe,
+         cls.tag, cls.ingredient) = seed(cls.size)
+        cls.token = Token.objects.create(user=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Версии данных живут в кэше и не откатываются вместе с транзакцией.
+        cache.clear()
+        self.anonymous = APIClient()
+        self.authorized = APIClient()
+        self.authorized.credentials(HTTP_AUTHORIZATION=f'Token '
+                                                       f'{self.token.key}')
+
+    def assertQueryBudget(self, budget, client, method, url, **kwargs):
+        """Выполняет запрос и падает с перечнем SQL, если бюджет превышен."""
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(url, **kwargs)
+        if len(context) > budget:
+            statements = '\n'.join(
+                f'{number}. {query["sql"]}'
+                for number, query in enumerate(context.captured_queries, 1)
+            )
+            self.fail(f'{method.upper()} {url}: {len(context)} запросов при '
+                      f'бюджете {budget}:\n{statements}')
+        return response
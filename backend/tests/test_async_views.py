@@ -0,0 +1,98 @@
+"""Асинхронные представления отдают то же, что и синхронные."""
+import json
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from backend.asgi import application
+from tests.fixtures import seed
+
+ROUTES = (
+    '/api/recipes/',
+    '/api/recipes/?page=1&tags=breakfast',
+    '/api/recipes/?is_favorited=1',
+    '/api/recipes/{recipe}/',
+    '/api/recipes/999999/',
+    '/api/tags/',
+    '/api/tags/{tag}/',
+    '/api/ingredients/?name=ингр',
+    '/api/ingredients/{ingredient}/',
+)
+
+
+@override_settings(ROOT_URLCONF='backend.asgi_urls')
+class AsyncViewsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, _, cls.recipe, cls.tag, cls.ingredient = seed(2)
+        cls.token = Token.objects.create(user=cls.user)
+
+    def url(self, template):
+        return template.format(recipe=self.recipe.id, tag=self.tag.id,
+                               ingredient=self.ingredient.id)
+
+    async def fetch(self, url, headers):
+        await sync_to_async(cache.clear)()
+        response = await self.async_client.get(url, headers=headers)
+        if response.streaming:
+            content = b''.join([chunk async for chunk in
+                                response.streaming_content])
+        else:
+            content = response.content
+        return response, content
+
+    async def test_same_responses_as_sync_views(self):
+        for headers in ({}, {'Authorization': f'Token {self.token.key}'}):
+            for template in ROUTES:
+                url = self.url(template)
+                with self.subTest(url=url, authorized=bool(headers)):
+                    await sync_to_async(cache.clear)()
+                    with override_settings(ROOT_URLCONF='backend.urls'):
+                        expected = await sync_to_async(self.client.get)(
+                            url, headers=headers)
+                    response, content = await self.fetch(url, headers)
+                    self.assertEqual(response.status_code,
+                                     expected.status_code)
+                    self.assertEqual(json.loads(content),
+                                     json.loads(expected.content))
+
+    async def test_shopping_cart_download(self):
+        headers = {'Authorization': f'Token {self.token.key}'}
+        url = '/api/recipes/download_shopping_cart/?file_format=csv'
+        response, content = await self.fetch(url, headers)
+        self.assertEqual(response.status_code, 200)
+        with override_settings(ROOT_URLCONF='backend.urls'):
+            expected = await sync_to_async(self.client.get)(url,
+                                                            headers=headers)
+        expected = await sync_to_async(b''.join)(expected.streaming_content)
+        self.assertEqual(content, expected)
+        # Синхронная версия под ASGI тоже отдаёт список потоком.
+        response, content = await self.fetch(
+            url, {**headers, 'Accept': 'text/html'})
+        self.assertTrue(response.is_async)
+        self.assertEqual(content, expected)
+        response, _ = await self.fetch(url, {})
+        self.assertEqual(response.status_code, 401)
+        response, _ = await self.fetch(url, {'Authorization': 'Token bad'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_writes_use_sync_views(self):
+        response = await self.async_client.delete(
+            f'/api/recipes/{self.recipe.id}/',
+            headers={'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response.status_code, 204)
+        response, _ = await self.fetch(f'/api/recipes/{self.recipe.id}/', {})
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get('/s/bad!/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_asgi_handler_uses_async_urls(self):
+        request, _ = application.create_request(
+            {'type': 'http', 'method': 'GET', 'path': '/api/tags/',
+             'query_string': b'', 'headers': []}, BytesIO())
+        self.assertEqual(request.urlconf, settings.ASGI_URLCONF)
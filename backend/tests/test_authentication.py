@@ -0,0 +1,107 @@
+"""Кэш пользователей по токенам и его сброс."""
+from unittest import skipIf
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from core.authentication import token_cache
+from core.metrics import registry
+from recipes.models import Ingredient, Tag
+from tests.fixtures import MEDIA_ROOT, PIXEL
+
+User = get_user_model()
+
+PASSWORD = 'Sup3r-secret-pass'
+
+
+# В тестах общий кэш заменяет кэш в памяти: без Redis кэш токенов отключён.
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    settings.AUTH_TOKEN_CACHE: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': settings.AUTH_TOKEN_CACHE,
+    },
+})
+class TokenCacheTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password=PASSWORD,
+            first_name='Имя', last_name='Фамилия')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        caches[settings.AUTH_TOKEN_CACHE].clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def token_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/users/me/')
+        return response, [query for query in context.captured_queries
+                          if 'authtoken_token' in query['sql']]
+
+    def test_second_request_skips_token_query(self):
+        hits, misses = token_cache.hits, token_cache.misses
+        response, queries = self.token_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        response, queries = self.token_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+        self.assertEqual(
+            (token_cache.hits - hits, token_cache.misses - misses), (1, 1))
+        self.assertIn('foodgram_auth_token_cache_hits_total',
+                      registry.render())
+
+    def test_logout_invalidates_token(self):
+        self.token_queries()
+        response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_deactivation_invalidates_token(self):
+        self.token_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_cached_token_loads_fresh_user(self):
+        self.token_queries()
+        User.objects.filter(pk=self.user.pk).update(first_name='Новое')
+        response, queries = self.token_queries()
+        self.assertEqual(queries, [])
+        self.assertEqual(response.data['first_name'], 'Новое')
+
+    def test_avatar_update_keeps_recipe_counter(self):
+        self.token_queries()
+        tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        ingredient = Ingredient.objects.create(name='Соль',
+                                               measurement_unit='г')
+        response = self.client.post('/api/recipes/', format='json', data={
+            'name': 'Рецепт', 'text': 'Описание', 'cooking_time': 5,
+            'image': PIXEL, 'tags': [tag.id],
+            'ingredients': [{'id': ingredient.id, 'amount': 10}]})
+        self.assertEqual(response.status_code, 201, response.data)
+        response = self.client.put('/api/users/me/avatar/', format='json',
+                                   data={'avatar': PIXEL})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.recipes_count, 1)
+
+
+@skipIf(settings.REDIS_URL, 'Кэш токенов в Redis включён.')
+class DisabledTokenCacheTests(APITestCase):
+
+    def test_no_shared_cache_without_redis(self):
+        user = User.objects.create_user(username='user', password=PASSWORD)
+        token = Token.objects.create(user=user)
+        token_cache.set(token.key, user.pk)
+        self.assertIsNone(token_cache.get(token.key))
@@ -0,0 +1,26 @@
+"""Загрузка изображений в base64."""
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+
+from core.serializers import Base64ImageField
+from tests.fixtures import PIXEL
+
+
+class Base64ImageFieldTests(SimpleTestCase):
+
+    def test_image_is_verified_from_disk(self):
+        # ImageField Django читает в память только файлы без пути на диске.
+        with mock.patch('django.forms.fields.BytesIO') as in_memory:
+            image_file = Base64ImageField().to_internal_value(PIXEL)
+        in_memory.assert_not_called()
+        self.assertTrue(image_file.temporary_file_path())
+        self.assertEqual((image_file.image.width, image_file.image.height),
+                         (1, 1))
+        self.assertEqual(image_file.content_type, 'image/png')
+
+    def test_invalid_base64(self):
+        with self.assertRaises(ValidationError):
+            Base64ImageField().to_internal_value(
+                'data:image/png;base64,not-base64!')
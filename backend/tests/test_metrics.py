@@ -0,0 +1,44 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from core.metrics import RequestMetrics, current_request
+from recipes.models import Tag
+from recipes.serializers import TagSerializer
+
+
+@override_settings(METRICS_TOKEN='secret', METRICS_SAMPLE_RATE=1)
+class MetricsTests(TestCase):
+
+    def test_requires_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 401)
+        response = self.client.get('/metrics/',
+                                   HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_disabled_without_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+
+    def test_records_requests_by_route(self):
+        self.client.get('/api/tags/')
+        response = self.client.get('/metrics/',
+                                   HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('foodgram_http_request_duration_seconds_count'
+                      '{route="api:tags-list",method="GET",status="2xx"}',
+                      body)
+        self.assertIn('foodgram_http_sql_queries_total'
+                      '{route="api:tags-list"', body)
+
+    def test_serialization_includes_serializer_data(self):
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        self.addCleanup(current_request.reset, token)
+        tags = [Tag(id=1, name='Завтрак', slug='breakfast')]
+        # Время списка считается один раз, без вложенных сериализаторов.
+        with mock.patch('core.metrics.perf_counter', side_effect=[1, 3]):
+            data = TagSerializer(tags, many=True).data
+        self.assertEqual(data[0]['slug'], 'breakfast')
+        self.assertEqual(metrics.serialization_seconds, 2)
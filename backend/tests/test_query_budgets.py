@@ -0,0 +1,155 @@
+"""Бюджеты SQL-запросов для всех маршрутов API.
+
+Каждый маршрут вызывается анонимно и с токеном. Число запросов не должно
+превышать объявленный бюджет и не должно зависеть от размера страницы:
+списки проверяются на двух наборах данных разного объёма.
+"""
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe
+from recipes.shortlinks import encode
+from tests.fixtures import PIXEL, SeededAPITestCase
+
+# (url, бюджет для анонима, бюджет для пользователя с токеном).
+# None — маршрут недоступен анониму, проверяется только код ответа.
+READ_ROUTES = (
+    ('/api/recipes/', 5, 6),
+    ('/api/recipes/?page=1', 5, 6),
+    ('/api/recipes/?page=1&tags=breakfast&tags=dinner', 6, 7),
+    ('/api/recipes/?search=рецепт&tags=breakfast', 6, 7),
+    ('/api/recipes/?is_favorited=1', 5, 6),
+    ('/api/recipes/?is_in_shopping_cart=1', 5, 6),
+    ('/api/recipes/?is_in_shopping_cart=0&author={author}', 6, 7),
+    ('/api/recipes/{recipe}/', 4, 5),
+    ('/api/recipes/{recipe}/get-link/', 1, 1),
+    ('/api/recipes/by_ingredients/?ingredients={ingredient},{ingredient2}',
+     5, 6),
+    ('/api/recipes/download_shopping_cart/', None, 2),
+    ('/api/tags/', 1, 2),
+    ('/api/tags/{tag}/', 1, 2),
+    ('/api/ingredients/', 1, 2),
+    ('/api/ingredients/?name=ингр', 1, 2),
+    ('/api/ingredients/{ingredient}/', 1, 2),
+    ('/api/users/', 2, 4),
+    ('/api/users/{author}/', 1, 3),
+    ('/api/users/me/', None, 2),
+    ('/api/users/feed/', None, 7),
+    ('/api/users/subscriptions/?recipes_limit=2', None, 5),
+    ('/api/users/subscriptions/?limit=1&recipes_limit=1', None, 5),
+)
+
+
+class QueryBudgetTests(SeededAPITestCase):
+
+    def url(self, template):
+        return template.format(recipe=self.recipe.id, author=self.author.id,
+                               tag=self.tag.id,
+                               ingredient=self.ingredient.id,
+                               ingredient2=self.ingredient.id + 1)
+
+    def test_read_routes(self):
+        for template, anonymous_budget, authorized_budget in READ_ROUTES:
+            url = self.url(template)
+            with self.subTest(url=url, user='anonymous'):
+                if anonymous_budget is None:
+                    response = self.anonymous.get(url)
+                    self.assertEqual(response.status_code, 401)
+                else:
+                    response = self.assertQueryBudget(
+                        anonymous_budget, self.anonymous, 'get', url)
+                    self.assertEqual(response.status_code, 200)
+            with self.subTest(url=url, user='authorized'):
+                response = self.assertQueryBudget(
+                    authorized_budget, self.authorized, 'get', url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_short_link_redirect(self):
+        url = f'/s/{encode(self.recipe.id)}/'
+        response = self.assertQueryBudget(0, self.anonymous, 'get', url)
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response['Location'], f'/recipes/{self.recipe.id}/')
+        response = self.assertQueryBudget(0, self.anonymous, 'get', '/s/0/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_recipe_write_routes(self):
+        data = {
+            'name': 'Новый рецепт',
+            'text': 'Описание',
+            'cooking_time': 5,
+            'image': PIXEL,
+            'tags': [self.tag.id],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 10}
+                for ingredient in Ingredient.objects.all()[:self.size + 1]
+            ],
+        }
+        response = self.assertQueryBudget(
+            18, self.authorized, 'post', '/api/recipes/', data=data,
+            format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        url = f'/api/recipes/{response.data["id"]}/'
+        data['ingredients'][0]['amount'] = 20
+        response = self.assertQueryBudget(
+            17, self.authorized, 'patch', url, data=data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        response = self.assertQueryBudget(
+            9, self.authorized, 'delete', url)
+        self.assertEqual(response.status_code, 204)
+
+    def test_relation_write_routes(self):
+        recipe = Recipe.objects.exclude(favorite__user=self.user).first()
+        routes = (
+            (f'/api/recipes/{recipe.id}/favorite/', 201, 204),
+            (f'/api/recipes/{recipe.id}/shopping_cart/', 201, 204),
+        )
+        for url, created, deleted in routes:
+            with self.subTest(url=url):
+                response = self.assertQueryBudget(
+                    6, self.authorized, 'post', url)
+                self.assertEqual(response.status_code, created)
+                response = self.assertQueryBudget(
+                    5, self.authorized, 'delete', url)
+                self.assertEqual(response.status_code, deleted)
+        url = f'/api/users/{self.author.id}/subscribe/'
+        response = self.assertQueryBudget(5, self.authorized, 'delete', url)
+        self.assertEqual(response.status_code, 204)
+        response = self.assertQueryBudget(
+            10, self.authorized, 'post', f'{url}?recipes_limit=1')
+        self.assertEqual(response.status_code, 201)
+
+    def test_user_routes(self):
+        response = self.assertQueryBudget(
+            4, self.anonymous, 'post', '/api/users/', data={
+                'email': 'new@example.com', 'username': 'new',
+                'first_name': 'Имя', 'last_name': 'Фамилия',
+                'password': 'Sup3r-secret-pass',
+            })
+        self.assertEqual(response.status_code, 201)
+        response = self.assertQueryBudget(
+            6, self.anonymous, 'post', '/api/auth/token/login/', data={
+                'email': 'new@example.com', 'password': 'Sup3r-secret-pass'})
+        self.assertEqual(response.status_code, 200)
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {response.data["auth_token"]}')
+        response = self.assertQueryBudget(
+            2, client, 'post', '/api/users/set_password/', data={
+                'current_password': 'Sup3r-secret-pass',
+                'new_password': 'An0ther-secret-pass'})
+        self.assertEqual(response.status_code, 204)
+        response = self.assertQueryBudget(
+            2, client, 'put', '/api/users/me/avatar/',
+            data={'avatar': PIXEL}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.assertQueryBudget(
+            2, client, 'delete', '/api/users/me/avatar/')
+        self.assertEqual(response.status_code, 204)
+        # Токены удаляются с выборкой, чтобы сбросить кэш аутентификации.
+        response = self.assertQueryBudget(
+            3, client, 'post', '/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+
+
+class LargeQueryBudgetTests(QueryBudgetTests):
+    """Те же бюджеты на данных, которые не помещаются на одну страницу."""
+    size = 12
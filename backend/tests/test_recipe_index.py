@@ -0,0 +1,29 @@
+"""Подбор рецептов по ингредиентам."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import IngredientRecipe, Recipe
+from recipes.recipe_index import recipe_index
+from tests.fixtures import SeededAPITestCase
+
+
+class RecipeIndexTests(SeededAPITestCase):
+
+    def test_recipe_index_applies_changes(self):
+        recipe_index.match([self.ingredient.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(author=self.author, name='Новый',
+                                           text='Описание', cooking_time=5)
+            IngredientRecipe.objects.create(recipe=recipe,
+                                            ingredient=self.ingredient,
+                                            amount=1)
+        with CaptureQueriesContext(connection) as context:
+            matched = recipe_index.match([self.ingredient.id])
+        self.assertIn((recipe.id, 1, 0), matched)
+        # Перечитываются только строки нового рецепта.
+        self.assertEqual(len(context), 1)
+        self.assertIn('WHERE', context.captured_queries[0]['sql'])
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        self.assertNotIn(recipe.id, [recipe_id for recipe_id, _, _ in
+                                     recipe_index.match([self.ingredient.id])])
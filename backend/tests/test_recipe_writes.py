@@ -0,0 +1,44 @@
+"""Создание и изменение рецептов."""
+from recipes.models import Tag
+from tests.fixtures import PIXEL, SeededAPITestCase
+
+
+class RecipeWriteTests(SeededAPITestCase):
+
+    def test_recipe_unknown_ingredients(self):
+        data = {
+            'name': 'Рецепт с ошибкой', 'text': 'Описание',
+            'cooking_time': 5, 'image': PIXEL, 'tags': [self.tag.id],
+            'ingredients': [{'id': self.ingredient.id, 'amount': 1},
+                            {'id': 10001, 'amount': 1},
+                            {'id': 10002, 'amount': 1}],
+        }
+        response = self.authorized.post(
+            '/api/recipes/', data=data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('10001, 10002', str(response.data['ingredients']))
+
+    def test_recipe_update_keeps_unchanged_rows(self):
+        rows = list(self.recipe.recipe_with_ingredient.order_by('pk'))
+        kept, changed, removed = rows[0], rows[1], rows[2]
+        response = self.authorized.patch(
+            f'/api/recipes/{self.recipe.id}/', format='json', data={
+                'name': 'Переименованный рецепт',
+                'tags': [tag.id for tag in Tag.objects.all()],
+                'ingredients': [
+                    {'id': kept.ingredient_id, 'amount': kept.amount},
+                    {'id': changed.ingredient_id, 'amount': 42},
+                    {'id': self.ingredient.id + 5, 'amount': 7},
+                ],
+            })
+        self.assertEqual(response.status_code, 200, response.data)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.name, 'Переименованный рецепт')
+        self.assertEqual(self.recipe.tags.count(), Tag.objects.count())
+        current = {row.ingredient_id: row
+                   for row in self.recipe.recipe_with_ingredient.all()}
+        self.assertEqual(current[kept.ingredient_id].pk, kept.pk)
+        self.assertEqual(current[changed.ingredient_id].pk, changed.pk)
+        self.assertEqual(current[changed.ingredient_id].amount, 42)
+        self.assertNotIn(removed.ingredient_id, current)
+        self.assertEqual(len(current), 3)
@@ -0,0 +1,79 @@
+"""Чтение с реплик и закрепление за основной базой после записи."""
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from core.db_router import ReplicaRouter, replica_reads, replicas
+from recipes.models import Recipe
+from tests.fixtures import seed
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        # В тестах реплика — то же подключение, что и основная база:
+        # иначе она не видит данные незавершённой транзакции теста.
+        cls.replica = connections['replica']
+        connections['replica'] = connections['default']
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'] = cls.replica
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, author, cls.recipe, _, _ = seed(2)
+        cls.token = Token.objects.create(user=cls.user)
+        cls.other_token = Token.objects.create(user=author)
+
+    def setUp(self):
+        cache.clear()
+        replicas.reset()
+        self.chosen = []
+        choose = replicas.choose
+        mock.patch.object(replicas, 'choose', side_effect=lambda: (
+            self.chosen.append(choose()) or self.chosen[-1])).start()
+        self.addCleanup(mock.patch.stopall)
+        self.headers = {'Authorization': f'Token {self.token.key}'}
+
+    def test_safe_reads_use_replica(self):
+        response = self.client.get('/api/recipes/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('replica', self.chosen)
+
+    def test_other_routes_use_primary(self):
+        self.client.get('/api/users/', headers=self.headers)
+        self.client.get('/api/recipes/', headers={
+            **self.headers, 'Cookie': 'primary_pin=1'})
+        self.assertEqual(self.chosen, [])
+
+    def test_write_pins_client_to_primary(self):
+        response = self.client.delete(
+            f'/api/recipes/{self.recipe.id}/favorite/', headers=self.headers)
+        self.assertEqual(response.status_code, 204)
+        self.assertIn('primary_pin', response.cookies)
+        # Клиент API без cookie закреплён по заголовку Authorization.
+        self.client.cookies.clear()
+        self.client.get('/api/recipes/', headers=self.headers)
+        self.assertEqual(self.chosen, [])
+        self.client.get('/api/recipes/', headers={
+            'Authorization': f'Token {self.other_token.key}'})
+        self.assertIn('replica', self.chosen)
+
+    def test_lagging_replica_is_skipped(self):
+        router = ReplicaRouter()
+        token = replica_reads.set(True)
+        self.addCleanup(replica_reads.reset, token)
+        self.assertEqual(router.db_for_read(Recipe), 'replica')
+        replicas.reset()
+        with mock.patch('core.db_router.replica_lag', return_value=60):
+            self.assertEqual(router.db_for_read(Recipe), 'default')
+        self.assertEqual(router.db_for_read(Token), 'default')
@@ -0,0 +1,61 @@
+"""Кэш ответов и смена версий данных после фиксации транзакции."""
+from recipes.models import Ingredient, Tag
+from tests.fixtures import SeededAPITestCase
+
+
+class ResponseCacheTests(SeededAPITestCase):
+
+    def test_anonymous_recipe_cache(self):
+        response = self.anonymous.get(
+            '/api/recipes/?page=1&tags=dinner&tags=breakfast')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        response = self.assertQueryBudget(
+            0, self.anonymous, 'get',
+            '/api/recipes/?tags=breakfast&page=1&tags=dinner')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        response = self.authorized.get(
+            '/api/recipes/?page=1&tags=dinner&tags=breakfast')
+        self.assertFalse(response.has_header('X-Cache'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.tags.set(Tag.objects.all())
+        response = self.anonymous.get(
+            '/api/recipes/?page=1&tags=dinner&tags=breakfast')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_anonymous_cache_after_name_edit(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        self.assertEqual(self.anonymous.get(url)['X-Cache'], 'MISS')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.authorized.patch(url, format='json', data={
+                'name': 'Новое название',
+                'tags': [tag.id for tag in self.recipe.tags.all()],
+                'ingredients': [
+                    {'id': row.ingredient_id, 'amount': row.amount}
+                    for row in self.recipe.recipe_with_ingredient.all()],
+            })
+            self.assertEqual(response.status_code, 200, response.data)
+            # До фиксации транзакции версия не меняется.
+            self.assertEqual(self.anonymous.get(url)['X-Cache'], 'HIT')
+        self.assertTrue(callbacks)
+        response = self.anonymous.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['name'], 'Новое название')
+
+    def test_ingredient_search_after_create(self):
+        url = '/api/ingredients/?name=зюз'
+        self.assertEqual(self.anonymous.get(url).data, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name='зюзник', measurement_unit='г')
+        self.assertEqual(
+            [item['name'] for item in self.anonymous.get(url).data],
+            ['зюзник'])
+
+    def test_tag_after_rename(self):
+        url = f'/api/tags/{self.tag.id}/'
+        self.assertEqual(self.anonymous.get(url).data['name'], 'breakfast')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.name = 'завтрак'
+            self.tag.save()
+            self.assertEqual(self.anonymous.get(url).data['name'],
+                             'breakfast')
+        self.assertEqual(self.anonymous.get(url).data['name'], 'завтрак')
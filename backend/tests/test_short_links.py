@@ -0,0 +1,26 @@
+"""Короткие ссылки на рецепты."""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe
+from tests.fixtures import SeededAPITestCase
+
+
+class ShortLinkTests(SeededAPITestCase):
+
+    def test_get_link_after_create_and_delete(self):
+        url = '/api/recipes/{}/get-link/'
+        self.anonymous.get(url.format(self.recipe.id))
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(author=self.author, name='Новый',
+                                           text='Описание', cooking_time=5)
+        with CaptureQueriesContext(connection) as context:
+            response = self.anonymous.get(url.format(recipe.id))
+        self.assertEqual(response.status_code, 200)
+        # Множество ID дополняется, а не перечитывается целиком.
+        self.assertTrue(all('WHERE' in query['sql']
+                            for query in context.captured_queries))
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        self.assertEqual(
+            self.anonymous.get(url.format(recipe.id)).status_code, 404)
@@ -0,0 +1,27 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+
+class SlowQueryLogTests(TestCase):
+
+    def setUp(self):
+        # Иначе список тэгов может прийти из кэша без запросов к базе.
+        cache.clear()
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_RATE=0)
+    def test_logs_statement_with_endpoint(self):
+        with self.assertLogs('foodgram.slow_queries', 'WARNING') as logs:
+            self.client.get('/api/tags/')
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        entry = next(entry for entry in entries
+                     if 'recipes_tag' in entry['sql'])
+        self.assertEqual(entry['endpoint']['route'], 'api:tags-list')
+        self.assertIn('duration_ms', entry)
+        self.assertIsNotNone(entry['location'])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_disabled(self):
+        with self.assertNoLogs('foodgram.slow_queries'):
+            self.client.get('/api/tags/')
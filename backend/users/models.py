@@ -21,6 +21,11 @@ class RegularUser(AbstractUser):
         unique=True,
         max_length=MAX_EMAIL_LENGTH,
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов',
+    )
 
     def __str__(self):
         return self.username
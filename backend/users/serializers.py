@@ -5,14 +5,15 @@ from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed
 
 from django.conf import settings
-from core.serializers import Base64ImageField
-from recipes.models import Subscriptions
+from core.serializers import (Base64ImageField, TimedDataMixin,
+                              TimedListSerializer)
+from recipes.relations import get_relations
 from users.constants import ME_PATH
 
 User = get_user_model()
 
 
-class AvatarSerializer(serializers.ModelSerializer):
+class AvatarSerializer(TimedDataMixin, serializers.ModelSerializer):
     avatar = Base64ImageField(required=True)
 
     class Meta:
@@ -23,12 +24,13 @@ class AvatarSerializer(serializers.ModelSerializer):
         avatar = validated_data.get('avatar', None)
         if avatar:
             instance.avatar = avatar
-        instance.save()
+        instance.save(update_fields=['avatar'])
         return instance
 
 
-class CustomUserSerializer(DjoserUserSerializer):
-    avatar = Base64ImageField(required=False, allow_null=True)
+class CustomUserSerializer(TimedDataMixin, DjoserUserSerializer):
+    avatar = Base64ImageField(required=False, allow_null=True,
+                              variant='thumb')
     password = serializers.CharField(write_only=True)
     is_subscribed = serializers.SerializerMethodField()
 
@@ -38,6 +40,7 @@ class CustomUserSerializer(DjoserUserSerializer):
             'email', 'id', 'username', 'first_name', 'last_name',
             'is_subscribed', 'avatar', 'password'
         )
+        list_serializer_class = TimedListSerializer
 
     def validate(self, attrs):
         if 'first_name' not in attrs or not attrs['first_name']:
@@ -58,11 +61,7 @@ class CustomUserSerializer(DjoserUserSerializer):
         return user
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if request and not request.user.is_anonymous:
-            return Subscriptions.objects.filter(user=request.user,
-                                                author=obj).exists()
-        return False
+        return obj.id in get_relations(self.context.get('request')).following
 
     def to_representation(self, instance):
         request = self.context.get('request')
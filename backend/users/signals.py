@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import token_cache
+from core.images import schedule_image_processing
+from .constants import AVATAR_VARIANTS
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def avatar_saved(instance, **kwargs):
+    schedule_image_processing(instance, 'avatar', AVATAR_VARIANTS)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    token_cache.invalidate(instance.key)